@@ -0,0 +1,180 @@
+"""/pong 포화 상태에서 /ping 지연시간을 측정하는 동시성 벤치마크
+
+FCM 전송(messaging.send_each)과 Supabase 조회를 지연시간이 있는 가짜 함수로 바꾼 뒤
+main.app을 로컬 uvicorn으로 띄우고, /pong 부하 유무에 따른 /ping 지연시간을 비교합니다.
+
+사용 예:
+    python bench_concurrency.py --pong-concurrency 32 --fcm-latency 0.5 --duration 10
+    python bench_concurrency.py --inline   # 블로킹 호출을 이벤트 루프에서 직접 실행(개선 전 동작)
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import uvicorn
+
+os.environ.pop("SUPABASE_URL", None)
+os.environ.pop("SUPABASE_ANON_KEY", None)
+
+import blocking  # noqa: E402
+import firebase_admin  # noqa: E402
+import main  # noqa: E402
+from firebase_admin import messaging  # noqa: E402
+
+
+class _FakeSendResponse:
+    def __init__(self, message_id):
+        self.message_id = message_id
+        self.exception = None
+        self.success = True
+
+
+class _FakeBatchResponse:
+    def __init__(self, responses):
+        self.responses = responses
+
+
+def _make_fake_send_each(latency: float):
+    def fake_send_each(messages, dry_run=False):
+        time.sleep(latency)
+        return _FakeBatchResponse([_FakeSendResponse(f"fake-{id(m)}") for m in messages])
+    return fake_send_each
+
+
+def _make_fake_fetch(latency: float):
+    def fake_fetch(client, date_key):
+        time.sleep(latency)
+        return {"title": f"{date_key} 이벤트", "body": "벤치마크용 본문"}
+    return fake_fetch
+
+
+async def _inline_run_blocking(func, *args, **kwargs):
+    """개선 전 동작 재현: 동기 호출을 이벤트 루프 스레드에서 그대로 실행"""
+    return func(*args, **kwargs)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(label, latencies):
+    if not latencies:
+        return f"{label:<16} 샘플 없음"
+    ms = [v * 1000 for v in latencies]
+    return (
+        f"{label:<16} n={len(ms):<5} p50={_percentile(ms, 50):8.2f}ms "
+        f"p95={_percentile(ms, 95):8.2f}ms p99={_percentile(ms, 99):8.2f}ms max={max(ms):8.2f}ms "
+        f"mean={statistics.mean(ms):8.2f}ms"
+    )
+
+
+async def _measure_ping(client: httpx.AsyncClient, duration: float, interval: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            resp = await client.get("/ping")
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError:
+            errors += 1
+        await asyncio.sleep(interval)
+    return latencies, errors
+
+
+async def _saturate_pong(client: httpx.AsyncClient, counter: list):
+    while True:
+        try:
+            resp = await client.post("/pong", json={"topics": ["history_9_kr"]})
+            resp.raise_for_status()
+            counter[0] += 1
+        except httpx.HTTPError:
+            counter[1] += 1
+
+
+async def _run(base_url: str, args):
+    limits = httpx.Limits(max_connections=args.pong_concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        baseline, _ = await _measure_ping(client, args.duration / 2, args.ping_interval)
+
+        pong_counts = [0, 0]
+        workers = [asyncio.create_task(_saturate_pong(client, pong_counts)) for _ in range(args.pong_concurrency)]
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        loaded, ping_errors = await _measure_ping(client, args.duration, args.ping_interval)
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    mode = "inline(블로킹)" if args.inline else f"thread-pool(max_workers={blocking.BLOCKING_POOL_SIZE})"
+    print(f"모드: {mode}, /pong 동시성={args.pong_concurrency}, FCM 지연={args.fcm_latency}s, Supabase 지연={args.supabase_latency}s")
+    print(_summary("/ping (무부하)", baseline))
+    print(_summary("/ping (/pong 포화)", loaded) + f" 실패={ping_errors}")
+    print(f"/pong 처리량: {pong_counts[0] / elapsed:.1f} req/s (실패 {pong_counts[1]}건)")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="/pong 포화 시 /ping 지연시간 벤치마크")
+    parser.add_argument("--pong-concurrency", type=int, default=32, help="동시 /pong 요청 수 (기본값: 32)")
+    parser.add_argument("--fcm-latency", type=float, default=0.5, help="가짜 FCM 전송 지연(초) (기본값: 0.5)")
+    parser.add_argument("--supabase-latency", type=float, default=0.1, help="가짜 Supabase 조회 지연(초) (기본값: 0.1)")
+    parser.add_argument("--duration", type=float, default=10, help="부하 측정 시간(초) (기본값: 10)")
+    parser.add_argument("--ping-interval", type=float, default=0.05, help="/ping 요청 간격(초) (기본값: 0.05)")
+    parser.add_argument("--timeout", type=float, default=10, help="요청 타임아웃(초) (기본값: 10)")
+    parser.add_argument("--inline", action="store_true", help="블로킹 호출을 이벤트 루프에서 직접 실행 (비교용)")
+    args = parser.parse_args()
+
+    logging.getLogger("main").setLevel(logging.WARNING)
+    logging.getLogger("fcm_batch").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("blocking").setLevel(logging.WARNING)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+
+    patches = [
+        patch.object(messaging, "send_each", _make_fake_send_each(args.fcm_latency)),
+        patch.object(main, "_fetch_event_from_supabase", _make_fake_fetch(args.supabase_latency)),
+        patch.object(main, "get_supabase_client", lambda client=MagicMock(): client),
+        patch.object(main, "initialize_firebase_app", lambda: True),
+        patch.object(firebase_admin, "_apps", {"[DEFAULT]": object()}),
+        patch.object(main.event_cache, "get", lambda date_key: None),
+    ]
+    if args.inline:
+        patches.append(patch.object(main, "run_blocking", _inline_run_blocking))
+
+    for p in patches:
+        p.start()
+    try:
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        asyncio.run(_run(f"http://127.0.0.1:{port}", args))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        for p in reversed(patches):
+            p.stop()
+
+
+if __name__ == "__main__":
+    main_cli()
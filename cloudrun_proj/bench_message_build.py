@@ -0,0 +1,81 @@
+"""FCM 메시지 생성 비용 마이크로벤치마크 (1000개 토픽 팬아웃 시뮬레이션)
+
+매번 전체 Message를 새로 만드는 방식과 FcmMessageTemplateCache(템플릿 재사용 + timestamp만
+새로 찍기)를 비교합니다. --encode를 주면 SDK의 JSON 인코딩 비용까지 포함해 측정합니다.
+
+사용 예:
+    python bench_message_build.py
+    python bench_message_build.py --topics 1000 --repeat 20 --encode
+"""
+import argparse
+import statistics
+import time
+
+from firebase_admin import messaging
+
+from message_templates import FcmMessageTemplateCache, build_fcm_message
+
+TITLE = "1950년 한국전쟁 발발"
+BODY = "1950년 6월 25일 새벽, 북한군이 38선 전역에서 남침을 개시하며 한국전쟁이 시작되었습니다."
+IMAGE_URL = "https://example.com/illustration/0625.webp"
+DATE_KEY = "0625"
+
+
+def _naive_wave(topics, encode):
+    for topic in topics:
+        message = build_fcm_message(TITLE, BODY, IMAGE_URL, topic)
+        if encode:
+            messaging._MessagingService.encode_message(message)
+
+
+def _template_wave(cache, topics, encode):
+    for topic in topics:
+        message = cache.build(DATE_KEY, topic, IMAGE_URL, TITLE, BODY)
+        if encode:
+            messaging._MessagingService.encode_message(message)
+
+
+def _measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label, samples, topics):
+    median = statistics.median(samples)
+    print(f"  {label:<24} median={median:8.2f} ms/wave  ({median * 1000 / topics:6.2f} µs/메시지)  min={min(samples):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FCM 메시지 생성 비용 마이크로벤치마크")
+    parser.add_argument("--topics", type=int, default=1000, help="팬아웃 토픽 수 (기본값: 1000)")
+    parser.add_argument("--repeat", type=int, default=20, help="반복 횟수 (기본값: 20)")
+    parser.add_argument("--encode", action="store_true", help="SDK JSON 인코딩 비용 포함")
+    args = parser.parse_args()
+
+    topics = [f"history_{offset % 27 - 12}_t{offset}" for offset in range(args.topics)]
+
+    print(f"📨 {args.topics}개 토픽 팬아웃, {args.repeat}회 반복, 인코딩 {'포함' if args.encode else '미포함'}")
+
+    naive = _measure(lambda: _naive_wave(topics, args.encode), args.repeat)
+    _report("매번 새로 생성", naive, args.topics)
+
+    cold_samples = []
+    for _ in range(args.repeat):
+        cache = FcmMessageTemplateCache(max_entries=args.topics)
+        cold_samples.extend(_measure(lambda: _template_wave(cache, topics, args.encode), 1))
+    _report("템플릿 (캐시 비어있음)", cold_samples, args.topics)
+
+    cache = FcmMessageTemplateCache(max_entries=args.topics)
+    _template_wave(cache, topics, False)
+    warm = _measure(lambda: _template_wave(cache, topics, args.encode), args.repeat)
+    _report("템플릿 (캐시 적중)", warm, args.topics)
+
+    print(f"  → 캐시 적중 시 {statistics.median(naive) / statistics.median(warm):.2f}배")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 동기 SDK 호출(supabase-py execute, firebase messaging)을 실행할 스레드 수 상한
+BLOCKING_POOL_SIZE = int(os.environ.get("BLOCKING_POOL_SIZE", 16))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """블로킹 호출 전용 스레드 풀을 가져오거나 생성"""
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking-io")
+        logger.info(f"블로킹 호출 스레드 풀 생성 (max_workers={BLOCKING_POOL_SIZE})")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """동기 함수를 전용 스레드 풀에서 실행하고 결과를 기다림
+
+    이벤트 루프를 막지 않으므로 느린 네트워크 호출 중에도 /ping 등 다른 요청이 처리됩니다.
+    풀 크기를 넘는 호출은 큐에서 대기하여 동시 외부 호출 수가 제한됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_blocking_executor() -> None:
+    """스레드 풀 종료 (진행 중인 작업은 기다리지 않음)"""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
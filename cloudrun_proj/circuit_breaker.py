@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """차단기가 열려 있어 호출하지 않고 거부됨"""
+    pass
+
+
+class CircuitBreaker:
+    """연속 실패 시 일정 시간 호출을 차단하는 서킷 브레이커
+
+    - closed: 정상 호출. 연속 실패가 failure_threshold에 도달하면 open
+    - open: reset_timeout_seconds 동안 호출하지 않고 즉시 CircuitOpenError
+    - half_open: 대기 후 한 번만 시험 호출을 허용. 성공하면 closed, 실패하면 다시 open
+
+    느린 외부 호출이 몰릴 때 타임아웃을 계속 기다리지 않고 바로 대체 경로로 넘어가게 합니다.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow_request(self) -> bool:
+        """호출 가능 여부. half_open에서는 동시에 하나의 시험 호출만 허용"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """차단기를 거쳐 func 호출. 열려 있으면 CircuitOpenError"""
+        if not self.allow_request():
+            raise CircuitOpenError("circuit breaker is open")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
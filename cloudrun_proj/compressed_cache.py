@@ -0,0 +1,101 @@
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Brotli는 선택 의존성 (설치되어 있으면 br 인코딩 제공)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> str:
+    """Accept-Encoding 헤더에서 사용할 인코딩 선택 (br > gzip > identity)"""
+    if not accept_encoding:
+        return "identity"
+
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # q=0 은 명시적 거부
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+
+class CompressedBodyCache:
+    """응답 본문과 인코딩별 압축본을 키(ETag 등)별로 캐시
+
+    같은 정적 데이터 요청은 JSON 직렬화와 압축을 한 번만 수행합니다.
+    minimum_size보다 작은 본문은 압축하지 않습니다 (압축 이득보다 헤더/CPU 비용이 큼).
+    """
+
+    def __init__(self, max_entries: int = 1024, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.max_entries = max_entries
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return body
+
+    def get(self, key: str, build_body: Callable[[], bytes], encoding: str) -> Tuple[bytes, str]:
+        """key의 본문을 encoding으로 반환. 없으면 build_body()로 만들어 저장
+
+        반환값: (본문 바이트, 실제 적용된 인코딩)
+        """
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants is not None:
+                self._entries.move_to_end(key)
+                identity = variants["identity"]
+                cached = variants.get(encoding)
+            else:
+                identity = None
+                cached = None
+
+        if identity is None:
+            identity = build_body()
+            variants = {"identity": identity}
+
+        if len(identity) < self.minimum_size:
+            encoding = "identity"
+            cached = identity
+        if cached is None:
+            cached = self._encode(identity, encoding)
+
+        with self._lock:
+            entry = self._entries.setdefault(key, variants)
+            entry[encoding] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached, encoding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,61 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class DedupBackend(ABC):
+    """Pub/Sub messageId 중복 처리 방지 저장소 추상 클래스
+
+    다른 백엔드(Redis, Firestore 등)는 claim/release를 구현하여 교체할 수 있습니다.
+    """
+
+    @abstractmethod
+    def claim(self, key: str) -> bool:
+        """처음 보는 키면 기록하고 True, 이미 처리(또는 처리 중)된 키면 False"""
+        pass
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """처리 실패 시 재전송된 메시지가 다시 처리되도록 기록 제거"""
+        pass
+
+
+class InMemoryLRUDedupStore(DedupBackend):
+    """TTL 만료와 최대 항목 수(LRU 제거)를 갖는 인메모리 중복 방지 저장소
+
+    인스턴스 단위 저장소이므로 같은 인스턴스로 재전송된 메시지만 걸러냅니다.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float) -> None:
+        # 삽입 순서 = 만료 순서이므로 앞에서부터 만료된 항목 제거
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    def claim(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            if key in self._entries:
+                return False
+            self._entries[key] = now + self.ttl_seconds
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,158 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+def resolve_local_datetime(offset_hours: int, now: Optional[datetime] = None) -> datetime:
+    """UTC 기준 시각에 오프셋(시간)을 더한 현지 시각 반환 (tzinfo 없음)"""
+    now = now or datetime.utcnow()
+    return now + timedelta(hours=offset_hours)
+
+
+def resolve_date_key(offset_hours: int, now: Optional[datetime] = None) -> str:
+    """오프셋 기준 현지 날짜 키(MMDD) 반환"""
+    return resolve_local_datetime(offset_hours, now).strftime('%m%d')
+
+
+def seconds_until_local_midnight(offset_hours: int, now: Optional[datetime] = None) -> float:
+    """오프셋 기준 현지 자정까지 남은 초"""
+    local_now = resolve_local_datetime(offset_hours, now)
+    next_midnight = (local_now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (next_midnight - local_now).total_seconds()
+
+
+class DailyEventCache:
+    """date_key(MMDD) 기준 오늘의 이벤트 인메모리 캐시
+
+    - 항목은 저장 시점 토픽 오프셋의 현지 자정에 만료됩니다
+    - max_ttl_seconds로 만료 상한을 두어 DB 수정도 일정 시간 내 반영됩니다
+    - 조회 실패(None)는 캐시하지 않습니다
+    - 만료된 항목은 덮어쓸 때까지 남겨 두어 get_stale()로 장애 시 대체값으로 사용합니다
+    """
+
+    def __init__(self, max_ttl_seconds: float = 3600):
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: Dict[str, Tuple[Dict[str, str], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, date_key: str) -> Optional[Dict[str, str]]:
+        """만료되지 않은 캐시 항목 반환. 없거나 만료 시 None"""
+        with self._lock:
+            entry = self._entries.get(date_key)
+            if entry is None:
+                return None
+            event, expires_at = entry
+            if time.time() >= expires_at:
+                return None
+            return event
+
+    def get_stale(self, date_key: str) -> Optional[Dict[str, str]]:
+        """만료 여부와 관계없이 마지막으로 저장된 항목 반환 (Supabase 장애 시 대체용)
+
+        만료된 항목도 date_key(MMDD)가 같으면 같은 날의 내용이므로 기본 문구보다 낫습니다.
+        항목 수는 date_key 수(최대 366)로 제한됩니다.
+        """
+        with self._lock:
+            entry = self._entries.get(date_key)
+            return entry[0] if entry else None
+
+    def set(self, date_key: str, event: Dict[str, str], offset_hours: int) -> None:
+        """오프셋 기준 현지 자정(또는 max_ttl_seconds 중 빠른 쪽)까지 유효하도록 저장"""
+        ttl = min(seconds_until_local_midnight(offset_hours), self.max_ttl_seconds)
+        with self._lock:
+            self._entries[date_key] = (event, time.time() + ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class DailyEventStore:
+    """daily_events 전체(최대 366행)를 메모리에 적재한 date_key 인덱스
+
+    - load()는 range 페이지 단위로 전체 행을 읽은 뒤 인덱스를 한 번에 교체합니다
+    - 적재 실패 시 기존 인덱스를 유지하므로 일시적인 Supabase 장애 중에도 조회가 가능합니다
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self):
+        self._events: Dict[str, Tuple[str, str]] = {}
+        self.loaded_at: Optional[float] = None
+        # 내용 해시와 내용이 마지막으로 바뀐 시각 (ETag/Last-Modified 용)
+        self.version: Optional[str] = None
+        self.modified_at: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def age_seconds(self) -> float:
+        """마지막 적재 후 경과 시간(초). 적재 전이면 무한대"""
+        if self.loaded_at is None:
+            return float("inf")
+        return time.time() - self.loaded_at
+
+    def load(self, client) -> int:
+        """Supabase에서 전체 행을 읽어 인덱스 교체. 적재된 행 수 반환"""
+        events: Dict[str, Tuple[str, str]] = {}
+        start = 0
+        while True:
+            resp = (
+                client
+                .table('daily_events')
+                .select('date_key, title, body')
+                .order('date_key')
+                .range(start, start + self.PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = resp.data or []
+            for row in rows:
+                date_key = row.get('date_key')
+                title = row.get('title')
+                body = row.get('body')
+                if date_key and title and body:
+                    events[date_key] = (title, body)
+            if len(rows) < self.PAGE_SIZE:
+                break
+            start += self.PAGE_SIZE
+
+        digest = hashlib.sha1()
+        for date_key in sorted(events):
+            title, body = events[date_key]
+            digest.update(f"{date_key}\x1f{title}\x1f{body}\x1e".encode("utf-8"))
+        version = digest.hexdigest()[:16]
+
+        # 참조 교체는 원자적이므로 조회 중인 요청에 영향 없음
+        now = time.time()
+        self._events = events
+        if version != self.version:
+            self.version = version
+            self.modified_at = now
+        self.loaded_at = now
+        return len(events)
+
+    def get(self, date_key: str) -> Optional[Dict[str, str]]:
+        """date_key에 해당하는 이벤트 반환. 없으면 None"""
+        event = self._events.get(date_key)
+        if event is None:
+            return None
+        return {"title": event[0], "body": event[1]}
+
+    def get_range(self, start_key: str, end_key: str) -> List[Dict[str, str]]:
+        """start_key~end_key(포함) 범위 이벤트를 날짜순으로 반환. start > end면 연말을 넘어 순환"""
+        events = self._events
+        if start_key <= end_key:
+            keys = sorted(k for k in events if start_key <= k <= end_key)
+        else:
+            keys = sorted(k for k in events if k >= start_key) + sorted(k for k in events if k <= end_key)
+        return [{"date_key": k, "title": events[k][0], "body": events[k][1]} for k in keys]
+
+    def __len__(self) -> int:
+        return len(self._events)
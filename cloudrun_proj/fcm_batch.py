@@ -0,0 +1,115 @@
+import logging
+import time
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+# firebase_admin은 콜드 스타트 비용을 줄이기 위해 실제 전송 시점에 임포트
+if TYPE_CHECKING:
+    from firebase_admin import messaging
+
+logger = logging.getLogger(__name__)
+
+
+def _retryable_errors() -> Tuple[type, ...]:
+    """일시적인 오류로 보고 재시도하는 예외 (그 외는 재시도해도 같은 결과)"""
+    from firebase_admin import exceptions
+
+    return (
+        exceptions.UnavailableError,
+        exceptions.InternalError,
+        exceptions.DeadlineExceededError,
+        exceptions.ResourceExhaustedError,
+    )
+
+
+def _encoding_error(message: "messaging.Message") -> Optional[ValueError]:
+    """send_each와 같은 방식으로 메시지를 미리 인코딩해 보고 실패하면 그 오류 반환
+
+    send_each는 보내기 전에 모든 메시지를 인코딩하므로, 잘못된 메시지(토픽 이름 등)가 하나라도 있으면
+    묶음 전체가 ValueError로 실패합니다. 미리 걸러 해당 메시지만 실패로 기록합니다.
+    """
+    from firebase_admin import messaging
+
+    try:
+        messaging._MessagingService.encode_message(message)
+    except ValueError as e:
+        return e
+    return None
+
+
+class FcmSendResult(NamedTuple):
+    """메시지 하나의 전송 결과"""
+    message_id: Optional[str]
+    error: Optional[Exception]
+    attempts: int
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class FcmBatchSender:
+    """FCM 메시지를 모아 messaging.send_each로 일괄 전송
+
+    - 호출당 최대 500건(FCM 제한)씩 나누어 전송합니다
+    - 메시지별 부분 실패를 처리하며, 재시도 가능한 오류로 실패한 메시지만 다시 보냅니다
+    - 인코딩할 수 없는 메시지는 미리 걸러 그 메시지만 실패로 기록하고 나머지는 전송합니다
+    - flush() 결과는 add() 순서와 같은 순서의 FcmSendResult 목록입니다
+    """
+
+    MAX_BATCH_SIZE = 500
+
+    def __init__(self, max_retries: int = 2, retry_backoff_seconds: float = 0.5, dry_run: bool = False):
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.dry_run = dry_run
+        self._messages: List["messaging.Message"] = []
+
+    def add(self, message: "messaging.Message") -> int:
+        """메시지를 대기열에 추가하고 결과 목록에서의 인덱스 반환"""
+        self._messages.append(message)
+        return len(self._messages) - 1
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def flush(self) -> List[FcmSendResult]:
+        """대기 중인 메시지를 모두 전송하고 대기열 비우기"""
+        from firebase_admin import messaging
+
+        retryable_errors = _retryable_errors()
+        messages, self._messages = self._messages, []
+        results: List[Optional[FcmSendResult]] = [None] * len(messages)
+        pending = []
+        for index, message in enumerate(messages):
+            error = _encoding_error(message)
+            if error is not None:
+                # 보내지 않은 메시지이므로 attempts=0, 재시도하지 않음
+                logger.error(f"FCM 메시지 인코딩 실패. 전송 제외: {error}")
+                results[index] = FcmSendResult(None, error, 0)
+            else:
+                pending.append(index)
+        attempt = 0
+
+        while pending:
+            attempt += 1
+            retry: List[int] = []
+            for start in range(0, len(pending), self.MAX_BATCH_SIZE):
+                chunk = pending[start:start + self.MAX_BATCH_SIZE]
+                try:
+                    batch = messaging.send_each([messages[i] for i in chunk], dry_run=self.dry_run)
+                    responses = [(r.message_id, r.exception) for r in batch.responses]
+                except Exception as e:
+                    # 호출 자체가 실패하면 묶음 전체를 같은 오류로 처리
+                    responses = [(None, e)] * len(chunk)
+
+                for index, (message_id, error) in zip(chunk, responses):
+                    results[index] = FcmSendResult(message_id, error, attempt)
+                    if error is not None and isinstance(error, retryable_errors) and attempt <= self.max_retries:
+                        retry.append(index)
+
+            if retry:
+                logger.warning(f"FCM 일괄 전송 일부 실패. {len(retry)}건 재시도 (attempt={attempt})")
+                time.sleep(self.retry_backoff_seconds * attempt)
+            pending = retry
+
+        return results
@@ -0,0 +1,297 @@
+"""Cloud Run 서비스 로컬 부하 테스트 (네트워크 없이 가짜 Supabase/FCM 사용)
+
+1) 지연시간을 설정할 수 있는 가짜 백엔드 서버를 띄웁니다
+   - Supabase PostgREST: GET /rest/v1/daily_events (date_key=eq., offset/limit, select 지원)
+   - FCM HTTP v1: POST /v1/projects/{project}/messages:send
+2) main.py 앱을 별도 uvicorn 프로세스로 실행합니다. SUPABASE_URL은 가짜 서버를 가리키고,
+   firebase_admin.messaging.send/send_each는 가짜 FCM 서버로 요청하도록 교체됩니다
+3) /ping, /pong을 지정한 RPS로 일정 간격(open-loop) 호출하고 처리량과 p50/p95/p99를 출력합니다
+
+사용 예:
+    python loadtest.py --rps 50 --duration 20
+    python loadtest.py --endpoints pong --rps 100 --fcm-latency 0.3 --supabase-latency 0.05
+    EVENT_PRELOAD=true python loadtest.py --topics history_9_kr history_-5_us
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FAKE_PROJECT_ID = "honey-history-loadtest"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# ---------------------------------------------------------------------------
+# 가짜 Supabase / FCM 서버
+# ---------------------------------------------------------------------------
+
+def create_fake_backend_app(supabase_latency: float, fcm_latency: float, fcm_failure_rate: float):
+    """가짜 PostgREST(daily_events)와 FCM HTTP v1 엔드포인트를 제공하는 앱"""
+    import random
+    from datetime import date, timedelta
+
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    # 윤년 기준 366일치 합성 데이터
+    rows = []
+    day = date(2024, 1, 1)
+    while day.year == 2024:
+        key = day.strftime("%m%d")
+        rows.append({"id": len(rows) + 1, "date_key": key, "title": f"{key} 오늘의 역사", "body": f"{key}에 있었던 일 " * 20})
+        day += timedelta(days=1)
+
+    fake = FastAPI()
+    fake.state.counters = {"supabase": 0, "fcm": 0}
+
+    @fake.get("/rest/v1/daily_events")
+    async def daily_events(request: Request):
+        fake.state.counters["supabase"] += 1
+        await asyncio.sleep(supabase_latency)
+
+        params = request.query_params
+        result = rows
+        date_filter = params.get("date_key")
+        if date_filter and date_filter.startswith("eq."):
+            result = [r for r in result if r["date_key"] == date_filter[3:]]
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", len(result)))
+        result = result[offset:offset + limit]
+
+        select = params.get("select")
+        if select and select != "*":
+            columns = [c.strip() for c in select.split(",")]
+            result = [{c: r.get(c) for c in columns} for r in result]
+        return JSONResponse(result)
+
+    @fake.post("/v1/projects/{project}/messages:send")
+    async def fcm_send(project: str, request: Request):
+        fake.state.counters["fcm"] += 1
+        await request.body()
+        await asyncio.sleep(fcm_latency)
+        if fcm_failure_rate and random.random() < fcm_failure_rate:
+            return JSONResponse({"error": {"code": 503, "status": "UNAVAILABLE", "message": "fake outage"}}, status_code=503)
+        return JSONResponse({"name": f"projects/{project}/messages/{random.getrandbits(48)}"})
+
+    return fake
+
+
+# ---------------------------------------------------------------------------
+# 서비스 프로세스 (--serve-app): messaging을 가짜 FCM 서버로 교체한 뒤 main.app 실행
+# ---------------------------------------------------------------------------
+
+def serve_app(port: int, fcm_url: str):
+    import firebase_admin
+    from firebase_admin import exceptions, messaging
+
+    http = httpx.Client(base_url=fcm_url, timeout=30, limits=httpx.Limits(max_connections=100))
+    pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fake-fcm")
+
+    def fake_send(message, dry_run=False):
+        payload = {"message": messaging._MessagingService.encode_message(message), "validate_only": dry_run}
+        resp = http.post(f"/v1/projects/{FAKE_PROJECT_ID}/messages:send", json=payload)
+        if resp.status_code != 200:
+            raise exceptions.UnavailableError(resp.text)
+        return resp.json()["name"]
+
+    def fake_send_each(messages, dry_run=False):
+        def send_one(message):
+            try:
+                return messaging.SendResponse({"name": fake_send(message, dry_run)}, None)
+            except exceptions.FirebaseError as e:
+                return messaging.SendResponse(None, e)
+        return messaging.BatchResponse(list(pool.map(send_one, messages)))
+
+    messaging.send = fake_send
+    messaging.send_each = fake_send_each
+    firebase_admin.initialize_app(options={"projectId": FAKE_PROJECT_ID})
+
+    sys.path.insert(0, HERE)
+    import main
+
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+# ---------------------------------------------------------------------------
+# 부하 생성
+# ---------------------------------------------------------------------------
+
+async def _drive(client: httpx.AsyncClient, endpoint: str, rps: float, duration: float, topics, stats):
+    """open-loop 방식: 응답 지연과 관계없이 1/rps 간격으로 요청 발사"""
+    interval = 1.0 / rps
+    tasks = []
+    started = time.perf_counter()
+    sequence = 0
+
+    async def one(seq: int):
+        request_started = time.perf_counter()
+        try:
+            if endpoint == "ping":
+                resp = await client.get("/ping")
+            else:
+                resp = await client.post("/pong", json={
+                    "message": {"messageId": f"loadtest-{seq}", "data": ""},
+                    "topics": topics,
+                })
+            ok = resp.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - request_started
+        stats["latencies" if ok else "errors"].append(elapsed)
+
+    while True:
+        target = started + sequence * interval
+        now = time.perf_counter()
+        if target - started >= duration:
+            break
+        if target > now:
+            await asyncio.sleep(target - now)
+        tasks.append(asyncio.create_task(one(sequence)))
+        sequence += 1
+
+    await asyncio.gather(*tasks)
+    stats["elapsed"] = time.perf_counter() - started
+
+
+def _report(endpoint: str, stats):
+    latencies = [v * 1000 for v in stats["latencies"]]
+    total = len(latencies) + len(stats["errors"])
+    throughput = len(latencies) / stats["elapsed"] if stats["elapsed"] else 0
+    if latencies:
+        print(
+            f"  /{endpoint:<5} 요청={total:<6} 성공={len(latencies):<6} 실패={len(stats['errors']):<4} "
+            f"처리량={throughput:7.1f} req/s  p50={_percentile(latencies, 50):8.2f}ms  "
+            f"p95={_percentile(latencies, 95):8.2f}ms  p99={_percentile(latencies, 99):8.2f}ms  "
+            f"max={max(latencies):8.2f}ms  mean={statistics.mean(latencies):8.2f}ms"
+        )
+    else:
+        print(f"  /{endpoint:<5} 요청={total:<6} 성공=0 실패={len(stats['errors'])}")
+
+
+async def _run_load(base_url: str, args):
+    limits = httpx.Limits(max_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        # 워밍업 (첫 요청의 SDK 지연 로드 비용을 측정에서 제외)
+        await client.get("/ping")
+        if "pong" in args.endpoints:
+            await client.post("/pong", json={"topics": args.topics})
+
+        all_stats = {endpoint: {"latencies": [], "errors": [], "elapsed": 0.0} for endpoint in args.endpoints}
+        await asyncio.gather(*(
+            _drive(client, endpoint, args.rps, args.duration, args.topics, all_stats[endpoint])
+            for endpoint in args.endpoints
+        ))
+        metrics_text = (await client.get("/metrics")).text if args.show_metrics else None
+    return all_stats, metrics_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cloud Run 서비스 로컬 부하 테스트 (가짜 Supabase/FCM)")
+    parser.add_argument("--endpoints", nargs="+", choices=["ping", "pong"], default=["ping", "pong"], help="부하를 줄 엔드포인트")
+    parser.add_argument("--rps", type=float, default=50, help="엔드포인트별 초당 요청 수 (기본값: 50)")
+    parser.add_argument("--duration", type=float, default=10, help="측정 시간(초) (기본값: 10)")
+    parser.add_argument("--topics", nargs="+", default=["history_9_kr"], help="/pong 요청의 topics (기본값: history_9_kr)")
+    parser.add_argument("--supabase-latency", type=float, default=0.05, help="가짜 Supabase 응답 지연(초) (기본값: 0.05)")
+    parser.add_argument("--fcm-latency", type=float, default=0.2, help="가짜 FCM 응답 지연(초) (기본값: 0.2)")
+    parser.add_argument("--fcm-failure-rate", type=float, default=0.0, help="가짜 FCM 503 응답 비율 0~1 (기본값: 0)")
+    parser.add_argument("--timeout", type=float, default=30, help="요청 타임아웃(초) (기본값: 30)")
+    parser.add_argument("--max-connections", type=int, default=500, help="부하 생성기 최대 동시 연결 수 (기본값: 500)")
+    parser.add_argument("--show-metrics", action="store_true", help="종료 후 서비스 /metrics 출력")
+    parser.add_argument("--serve-app", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--fcm-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_app:
+        serve_app(args.port, args.fcm_url)
+        return
+
+    # 1) 가짜 백엔드
+    backend_port = _free_port()
+    backend_url = f"http://127.0.0.1:{backend_port}"
+    backend_app = create_fake_backend_app(args.supabase_latency, args.fcm_latency, args.fcm_failure_rate)
+    backend = uvicorn.Server(uvicorn.Config(backend_app, host="127.0.0.1", port=backend_port, log_level="warning"))
+    backend_thread = threading.Thread(target=backend.run, daemon=True)
+    backend_thread.start()
+    while not backend.started:
+        time.sleep(0.05)
+
+    # 2) 서비스 프로세스
+    app_port = _free_port()
+    env = dict(
+        os.environ,
+        SUPABASE_URL=backend_url,
+        SUPABASE_ANON_KEY="loadtest.fake.anon-key",
+        PYTHONUNBUFFERED="1",
+    )
+    env.pop("FIREBASE_CREDENTIALS_PATH", None)
+    service = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve-app", "--port", str(app_port), "--fcm-url", backend_url],
+        cwd=HERE,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL if not os.environ.get("LOADTEST_VERBOSE") else None,
+    )
+
+    try:
+        base_url = f"http://127.0.0.1:{app_port}"
+        deadline = time.time() + 30
+        while True:
+            if service.poll() is not None:
+                raise RuntimeError(f"서비스 프로세스 종료 (code={service.returncode}). LOADTEST_VERBOSE=1로 로그 확인")
+            try:
+                if httpx.get(f"{base_url}/ping", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                raise TimeoutError("서비스가 30초 내에 준비되지 않음")
+            time.sleep(0.1)
+
+        # 3) 부하 생성
+        print(
+            f"🚦 부하 테스트: {', '.join('/' + e for e in args.endpoints)} 각 {args.rps} req/s × {args.duration}s, "
+            f"topics={args.topics}, Supabase 지연={args.supabase_latency}s, FCM 지연={args.fcm_latency}s"
+        )
+        backend_app.state.counters.update(supabase=0, fcm=0)
+        all_stats, metrics_text = asyncio.run(_run_load(base_url, args))
+        for endpoint, stats in all_stats.items():
+            _report(endpoint, stats)
+        counters = backend_app.state.counters
+        print(f"  가짜 백엔드 호출: Supabase={counters['supabase']}  FCM={counters['fcm']}")
+        if metrics_text:
+            print("\n📈 서비스 /metrics")
+            print("\n".join(line for line in metrics_text.splitlines() if not line.startswith("#") and "_bucket" not in line))
+    finally:
+        service.terminate()
+        try:
+            service.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            service.kill()
+        backend.should_exit = True
+        backend_thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
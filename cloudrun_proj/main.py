@@ -1,13 +1,31 @@
-from fastapi import FastAPI, Query, HTTPException, Request
+import asyncio
+import base64
+import json
+from fastapi import FastAPI, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from typing import TYPE_CHECKING, List, Dict, Optional
 import random
-from datetime import datetime, timedelta
+import re
+import threading
+from datetime import datetime
 import os
-from supabase import create_client, Client
+import time
 import logging
-import firebase_admin
-from firebase_admin import credentials, messaging
+from blocking import run_blocking, shutdown_blocking_executor
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from compressed_cache import CompressedBodyCache, choose_encoding
+from dedup_store import DedupBackend, InMemoryLRUDedupStore
+from fcm_batch import FcmBatchSender
+from message_templates import FcmMessageTemplateCache
+from prerender import PrerenderedStore, RenderedNotification, render_notifications
+import metrics
+from event_cache import DailyEventCache, DailyEventStore, resolve_date_key, resolve_local_datetime, seconds_until_local_midnight
+
+# supabase, firebase_admin은 임포트 비용이 커서 콜드 스타트를 늘리므로 처음 사용할 때 임포트
+if TYPE_CHECKING:
+    from supabase import Client
+    from firebase_admin import messaging
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -28,8 +46,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 이 크기(바이트) 이상인 응답만 압축
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+
+# 동적 응답 gzip 압축 (이미 Content-Encoding이 있는 /events 응답은 그대로 통과)
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # Supabase 클라이언트 초기화
-supabase_client: Optional[Client] = None
+supabase_client: Optional["Client"] = None
+# 지연 초기화 스레드와 요청 처리 스레드가 동시에 클라이언트를 만들지 않도록 보호
+_supabase_client_lock = threading.Lock()
+
+# Supabase(PostgREST) HTTP 전송 설정: 연결 풀/keep-alive 재사용, 요청별 타임아웃
+SUPABASE_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("SUPABASE_CONNECT_TIMEOUT_SECONDS", 3))
+SUPABASE_TIMEOUT_SECONDS = float(os.environ.get("SUPABASE_TIMEOUT_SECONDS", 5))
+SUPABASE_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_MAX_CONNECTIONS", 20))
+SUPABASE_MAX_KEEPALIVE = int(os.environ.get("SUPABASE_MAX_KEEPALIVE", 10))
+SUPABASE_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("SUPABASE_KEEPALIVE_EXPIRY_SECONDS", 60))
+SUPABASE_HTTP2 = os.environ.get("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# 연속 실패 시 Supabase 조회를 잠시 건너뛰고 캐시/기본 문구로 대체
+supabase_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get("SUPABASE_BREAKER_FAILURES", 5)),
+    reset_timeout_seconds=float(os.environ.get("SUPABASE_BREAKER_RESET_SECONDS", 30)),
+)
+
+# 지연 초기화 모드: 시작 시 SDK 로드/네트워크 점검을 기다리지 않고 포트 바인딩 후 백그라운드에서 수행
+LAZY_INIT = os.environ.get("LAZY_INIT", "false").lower() in ("1", "true", "yes")
+_lazy_init_task: Optional[asyncio.Task] = None
+
+# 서비스 기본 FCM 토픽 (UTC+9, 한국)
+DEFAULT_TOPIC = "history_9_kr"
+
+# FCM 토픽 이름 규칙. send_each는 전송 전에 모든 메시지를 인코딩하므로 잘못된 토픽이 하나라도 있으면 호출 전체가 실패함
+FCM_TOPIC_PATTERN = re.compile(r"^[a-zA-Z0-9\-_.~%]+$")
+
+# 오늘의 이벤트 캐시 (date_key 기준, 현지 자정 만료)
+event_cache = DailyEventCache(
+    max_ttl_seconds=float(os.environ.get("EVENT_CACHE_TTL_SECONDS", 3600))
+)
+
+# daily_events 전체 사전 적재 (EVENT_PRELOAD=true 일 때 사용)
+EVENT_PRELOAD = os.environ.get("EVENT_PRELOAD", "false").lower() in ("1", "true", "yes")
+EVENT_PRELOAD_REFRESH_SECONDS = float(os.environ.get("EVENT_PRELOAD_REFRESH_SECONDS", 3600))
+event_store = DailyEventStore()
+_event_store_refresh_task: Optional[asyncio.Task] = None
+
+# 사전 생성 알림 스냅샷 (POST /prerender 또는 prerender.py로 생성, /pong이 먼저 조회)
+PRERENDER_DAYS = int(os.environ.get("PRERENDER_DAYS", 2))
+PRERENDER_SNAPSHOT_PATH = os.environ.get("PRERENDER_SNAPSHOT_PATH")
+prerendered_store = PrerenderedStore()
 
 
 def _parse_topic_utc_offset_hours(topic_name: Optional[str]) -> Optional[int]:
@@ -44,8 +110,6 @@ def _parse_topic_utc_offset_hours(topic_name: Optional[str]) -> Optional[int]:
         return None
 
     try:
-        import re
-
         # 패턴 예시: "history_9_kr", "foo_-3_bar" 등에서 숫자 캡처
         match = re.search(r"_(?P<hours>-?\d+)_", topic_name)
         if match:
@@ -60,11 +124,17 @@ def _parse_topic_utc_offset_hours(topic_name: Optional[str]) -> Optional[int]:
     return None
 
 
-def get_supabase_client() -> Optional[Client]:
+def get_supabase_client() -> Optional["Client"]:
     """Supabase 클라이언트를 가져오거나 생성"""
     global supabase_client
 
-    if supabase_client is None:
+    if supabase_client is not None:
+        return supabase_client
+
+    with _supabase_client_lock:
+        if supabase_client is not None:
+            return supabase_client
+
         # 환경변수에서 가져오기 (Cloud Run은 환경변수 사용)
         SUPABASE_URL = os.environ.get("SUPABASE_URL")
         SUPABASE_KEY = os.environ.get("SUPABASE_ANON_KEY")
@@ -74,51 +144,129 @@ def get_supabase_client() -> Optional[Client]:
             return None
 
         try:
-            supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+            from supabase import ClientOptions, create_client
+
+            options = ClientOptions(httpx_client=_create_supabase_http_client())
+            supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY, options)
             logger.info("Supabase 클라이언트 초기화 성공")
         except Exception as e:
             logger.error(f"Supabase 클라이언트 초기화 실패: {str(e)}")
             return None
 
-    return supabase_client
+        return supabase_client
 
 
-# 오늘 날짜의 이벤트를 Supabase에서 조회
-def get_today_event_from_supabase(client: Client, topic_name: Optional[str] = None) -> Optional[Dict[str, str]]:
-    try:
-        # 토픽에서 시간대 오프셋(시간) 추출. 실패 시 KR(+9) 기본값 사용
-        offset_hours = _parse_topic_utc_offset_hours(topic_name)
-        if offset_hours is None:
-            offset_hours = 9
-
-        today_dt = datetime.utcnow() + timedelta(hours=offset_hours)
-        today_str = today_dt.strftime('%m%d')
-        resp = (
-            client
-            .table('daily_events')
-            .select('title, body')
-            .eq('date_key', today_str)
-            .limit(1)
-            .execute()
-        )
+def _create_supabase_http_client():
+    """Supabase 클라이언트가 공유할 httpx 연결 풀
+
+    supabase-py 기본 클라이언트는 타임아웃이 120초라 느린 PostgREST 응답이 /pong을 오래 붙잡습니다.
+    auth는 절대 URL로, postgrest는 이 클라이언트의 base_url을 rest/v1로 설정해 사용합니다.
+    """
+    import httpx
+
+    return httpx.Client(
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT_SECONDS, connect=SUPABASE_CONNECT_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        http2=SUPABASE_HTTP2,
+        follow_redirects=True,
+    )
+
+
+def _fetch_event_from_supabase(client: "Client", date_key: str) -> Optional[Dict[str, str]]:
+    """daily_events에서 date_key에 해당하는 title/body 조회. 없거나 필드 누락 시 None"""
+    resp = (
+        client
+        .table('daily_events')
+        .select('title, body')
+        .eq('date_key', date_key)
+        .limit(1)
+        .execute()
+    )
+
+    if resp.data:
+        event = resp.data[0]
+        title = event.get('title')
+        body = event.get('body')
+        if title and body:
+            return {"title": title, "body": body}
+    return None
+
+
+def _resolve_topic_offset_hours(topic_name: Optional[str]) -> int:
+    """토픽의 UTC 오프셋(시간). 추출 실패 시 KR(+9) 기본값"""
+    offset_hours = _parse_topic_utc_offset_hours(topic_name)
+    return 9 if offset_hours is None else offset_hours
 
-        if resp.data:
-            event = resp.data[0]
-            title = event.get('title')
-            body = event.get('body')
-            if title and body:
-                logger.info(f"Supabase 오늘 이벤트 사용(date_key={today_str}, offset={offset_hours}h, topic={topic_name})")
-                return {"title": title, "body": body}
-        logger.warning(f"오늘(date_key={today_str}) 이벤트가 없거나 필드 누락. payload/기본값 사용 (offset={offset_hours}h, topic={topic_name})")
+
+# date_key에 해당하는 이벤트 조회 (사전 적재 인덱스 > 캐시 > Supabase)
+def get_event_for_date_key(client: "Client", date_key: str, offset_hours: int, topic_name: Optional[str] = None) -> Optional[Dict[str, str]]:
+    try:
+        # 사전 적재된 인덱스가 있으면 네트워크 없이 조회
+        if _is_event_store_usable():
+            event = event_store.get(date_key)
+            if event:
+                metrics.EVENT_LOOKUPS.inc(source="store")
+                logger.info(f"사전 적재 이벤트 사용(date_key={date_key}, offset={offset_hours}h, topic={topic_name})")
+            else:
+                metrics.EVENT_LOOKUPS.inc(source="missing")
+                logger.warning(f"사전 적재 인덱스에 오늘(date_key={date_key}) 이벤트 없음. payload/기본값 사용 (topic={topic_name})")
+            return event
+
+        cached = event_cache.get(date_key)
+        if cached:
+            metrics.EVENT_LOOKUPS.inc(source="cache")
+            logger.info(f"캐시된 오늘 이벤트 사용(date_key={date_key}, offset={offset_hours}h, topic={topic_name})")
+            return cached
+
+        with metrics.SUPABASE_LOOKUP_SECONDS.time():
+            event = supabase_breaker.call(_fetch_event_from_supabase, client, date_key)
+        if event:
+            metrics.EVENT_LOOKUPS.inc(source="supabase")
+            event_cache.set(date_key, event, offset_hours)
+            logger.info(f"Supabase 오늘 이벤트 사용(date_key={date_key}, offset={offset_hours}h, topic={topic_name})")
+            return event
+        metrics.EVENT_LOOKUPS.inc(source="missing")
+        logger.warning(f"오늘(date_key={date_key}) 이벤트가 없거나 필드 누락. payload/기본값 사용 (offset={offset_hours}h, topic={topic_name})")
         return None
+    except CircuitOpenError:
+        metrics.SUPABASE_CIRCUIT_REJECTIONS.inc()
+        logger.warning(f"Supabase 차단기 열림. 조회 생략 (date_key={date_key}, topic={topic_name})")
+        return _get_fallback_event(date_key)
     except Exception as e:
         logger.error(f"Supabase 오늘 이벤트 조회 실패: {str(e)}")
-        return None
+        return _get_fallback_event(date_key)
+
+
+def _get_fallback_event(date_key: str) -> Optional[Dict[str, str]]:
+    """Supabase 조회 불가 시 만료된 캐시나 오래된 사전 적재 인덱스의 같은 날 이벤트 사용. 없으면 None(기본 문구)"""
+    event = event_cache.get_stale(date_key) or event_store.get(date_key)
+    if event:
+        metrics.EVENT_LOOKUPS.inc(source="stale")
+        logger.info(f"Supabase 대신 이전에 받은 이벤트 사용(date_key={date_key})")
+        return event
+    metrics.EVENT_LOOKUPS.inc(source="error")
+    return None
+
+
+# 오늘 날짜의 이벤트를 Supabase에서 조회 (캐시 우선)
+def get_today_event_from_supabase(client: "Client", topic_name: Optional[str] = None) -> Optional[Dict[str, str]]:
+    # 토픽에서 시간대 오프셋(시간) 추출. 실패 시 KR(+9) 기본값 사용
+    offset_hours = _resolve_topic_offset_hours(topic_name)
+    return get_event_for_date_key(client, resolve_date_key(offset_hours), offset_hours, topic_name)
 
 # Firebase Admin 초기화
 def initialize_firebase_app() -> bool:
     """Firebase Admin SDK 초기화. 이미 초기화되어 있으면 True 반환"""
     try:
+        import firebase_admin
+        from firebase_admin import credentials
+        # 메시지 생성(이벤트 루프)에서 처음 임포트하지 않도록 초기화 스레드에서 미리 로드
+        from firebase_admin import messaging  # noqa: F401
+
         # 이미 초기화된 경우
         if firebase_admin._apps:
             return True
@@ -139,27 +287,111 @@ def initialize_firebase_app() -> bool:
         return False
 
 
+def _is_event_store_usable() -> bool:
+    """사전 적재 인덱스로 조회할 수 있는지 여부
 
-@app.on_event("startup")
-async def startup_event():
-    """앱 시작시 Supabase 연결 테스트"""
-    client = get_supabase_client()
-    if client:
+    EVENT_PRELOAD 모드에서는 갱신이 실패해도 마지막 인덱스를 계속 사용하고,
+    /events 요청으로 필요 시 적재된 경우에는 갱신 주기 안에서만 사용합니다.
+    """
+    if not event_store.is_loaded:
+        return False
+    return EVENT_PRELOAD or event_store.age_seconds() < EVENT_PRELOAD_REFRESH_SECONDS
+
+
+def load_event_store(client: "Client") -> bool:
+    """daily_events 전체를 사전 적재. 실패 시 기존 인덱스 유지"""
+    try:
+        count = event_store.load(client)
+        logger.info(f"daily_events 사전 적재 완료 ({count}건)")
+        return True
+    except Exception as e:
+        logger.error(f"daily_events 사전 적재 실패 (기존 {len(event_store)}건 유지): {str(e)}")
+        return False
+
+
+async def _refresh_event_store_periodically(client: "Client", interval_seconds: float):
+    """주기적으로 사전 적재 인덱스를 갱신하는 백그라운드 작업"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await run_blocking(load_event_store, client)
+
+
+async def _initialize_services():
+    """Supabase 연결 테스트 및 오늘 이벤트 캐시 워밍업, Firebase 초기화
+
+    EVENT_PRELOAD가 켜져 있으면 연결 테스트 대신 daily_events 전체를 적재하고
+    EVENT_PRELOAD_REFRESH_SECONDS 주기로 백그라운드 갱신합니다.
+    """
+    global _event_store_refresh_task
+
+    client = await run_blocking(get_supabase_client)
+    if client and EVENT_PRELOAD:
+        await run_blocking(load_event_store, client)
+        _event_store_refresh_task = asyncio.create_task(
+            _refresh_event_store_periodically(client, EVENT_PRELOAD_REFRESH_SECONDS)
+        )
+    elif client:
         try:
             # 연결 테스트
-            response = client.table('daily_events').select("id").limit(1).execute()
+            response = await run_blocking(client.table('daily_events').select("id").limit(1).execute)
             logger.info("Supabase 연결 테스트 성공")
         except Exception as e:
             logger.error(f"Supabase 연결 테스트 실패: {str(e)}")
 
+        # 기본 토픽의 오늘 이벤트로 캐시 워밍업
+        if await run_blocking(get_today_event_from_supabase, client, DEFAULT_TOPIC):
+            logger.info(f"오늘 이벤트 캐시 워밍업 완료 (topic={DEFAULT_TOPIC})")
+
+    # 이전에 생성한 알림 스냅샷이 있으면 적재
+    if PRERENDER_SNAPSHOT_PATH and os.path.exists(PRERENDER_SNAPSHOT_PATH):
+        try:
+            count = await run_blocking(prerendered_store.load, PRERENDER_SNAPSHOT_PATH)
+            logger.info(f"사전 생성 알림 스냅샷 적재 완료 ({count}건)")
+        except Exception as e:
+            logger.error(f"사전 생성 알림 스냅샷 적재 실패: {str(e)}")
+
     # Firebase 초기화 시도
-    initialize_firebase_app()
+    await run_blocking(initialize_firebase_app)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """앱 시작시 서비스 초기화
+
+    LAZY_INIT이 켜져 있으면 초기화를 백그라운드 작업으로 넘겨 즉시 트래픽을 받습니다.
+    초기화 전에 들어온 요청은 각 핸들러에서 필요한 SDK를 바로 초기화합니다.
+    """
+    global _lazy_init_task
+
+    if LAZY_INIT:
+        _lazy_init_task = asyncio.create_task(_initialize_services())
+        logger.info("지연 초기화 모드: 백그라운드에서 서비스 초기화")
+        return
+
+    await _initialize_services()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """백그라운드 작업 및 블로킹 호출 스레드 풀 정리"""
+    if _lazy_init_task:
+        _lazy_init_task.cancel()
+    if _event_store_refresh_task:
+        _event_store_refresh_task.cancel()
+    shutdown_blocking_executor()
+
+
+def _supabase_status() -> str:
+    """Supabase 연결 상태. 지연 초기화 모드에서는 상태 확인이 SDK 로드를 유발하지 않음"""
+    if LAZY_INIT and supabase_client is None:
+        return "initializing" if _lazy_init_task and not _lazy_init_task.done() else "disconnected"
+    return "connected" if get_supabase_client() else "disconnected"
 
 
 @app.get("/ping")
 async def ping():
     """헬스체크 및 연결 테스트용 엔드포인트"""
-    supabase_status = "connected" if get_supabase_client() else "disconnected"
+    supabase_status = _supabase_status()
 
     return {
         "status": "healthy",
@@ -168,92 +400,473 @@ async def ping():
         "service": "cloud-run-fastapi",
         "region": os.environ.get("REGION", "unknown"),
         "revision": os.environ.get("K_REVISION", "unknown"),
-        "supabase_status": supabase_status
+        "supabase_status": supabase_status,
+        "supabase_circuit": supabase_breaker.state
+    }
+
+
+DEFAULT_NOTIFICATION_TITLE = "오늘의 역사"
+DEFAULT_NOTIFICATION_BODY = "오늘은 무슨 일이 있었을까요?"
+
+# 일시적 오류로 실패한 FCM 메시지 재시도 횟수
+FCM_MAX_RETRIES = int(os.environ.get("FCM_MAX_RETRIES", 2))
+
+# Pub/Sub 재전송(at-least-once) 중복 처리 방지 저장소 (messageId 기준)
+dedup_store: DedupBackend = InMemoryLRUDedupStore(
+    max_entries=int(os.environ.get("DEDUP_MAX_ENTRIES", 10000)),
+    ttl_seconds=float(os.environ.get("DEDUP_TTL_SECONDS", 600)),
+)
+
+
+# (date_key, topic, image_url)별 FCM 메시지 템플릿 캐시
+message_templates = FcmMessageTemplateCache(
+    max_entries=int(os.environ.get("MESSAGE_TEMPLATE_CACHE_SIZE", 4096))
+)
+
+
+def set_dedup_store(backend: DedupBackend) -> None:
+    """중복 방지 저장소 교체 (예: 인스턴스 간 공유 백엔드)"""
+    global dedup_store
+    dedup_store = backend
+
+
+def _extract_pubsub_message_id(payload) -> Optional[str]:
+    """Pub/Sub Push envelope의 message.messageId (message_id 표기도 허용)"""
+    if not isinstance(payload, dict):
+        return None
+    message = payload.get("message")
+    if not isinstance(message, dict):
+        return None
+    message_id = message.get("messageId") or message.get("message_id")
+    return str(message_id) if message_id else None
+
+
+def _extract_pubsub_options(payload) -> Dict:
+    """요청 바디와 Pub/Sub Push envelope의 message.data(JSON)를 합쳐 옵션 dict로 반환
+
+    Cloud Scheduler → Pub/Sub 경로에서는 옵션이 base64 인코딩된 message.data로 전달되고,
+    로컬 테스트에서는 요청 바디 최상위에 직접 전달됩니다. 최상위 값이 우선합니다.
+    """
+    if not isinstance(payload, dict):
+        return {}
+
+    options: Dict = {}
+    message = payload.get("message")
+    if isinstance(message, dict) and message.get("data"):
+        try:
+            decoded = json.loads(base64.b64decode(message["data"]).decode("utf-8"))
+            if isinstance(decoded, dict):
+                options.update(decoded)
+        except Exception as e:
+            logger.warning(f"Pub/Sub message.data 파싱 실패: {str(e)}")
+
+    options.update({k: v for k, v in payload.items() if k not in ("message", "subscription")})
+    return options
+
+
+def _is_valid_topic(topic) -> bool:
+    return isinstance(topic, str) and bool(FCM_TOPIC_PATTERN.match(topic))
+
+
+def _resolve_target_topics(options: Dict) -> List[str]:
+    """발송 대상 토픽 목록. 우선순위: 요청 topics > FCM_TOPICS 환경변수 > 기본 토픽
+
+    요청 topics에 FCM 토픽 규칙에 맞지 않는 값이 있으면 ValueError를 발생시키고,
+    FCM_TOPICS 환경변수의 잘못된 항목은 로그를 남기고 건너뜁니다.
+    """
+    topics = options.get("topics")
+    if isinstance(topics, str):
+        topics = [topics]
+    if topics:
+        if not isinstance(topics, list):
+            raise ValueError(f"Invalid topics: {topics!r}")
+        invalid = [t for t in topics if not _is_valid_topic(t)]
+        if invalid:
+            raise ValueError(f"Invalid topics: {invalid!r}")
+    if not topics:
+        topics = []
+        for t in os.environ.get("FCM_TOPICS", "").split(","):
+            t = t.strip()
+            if not t:
+                continue
+            if not _is_valid_topic(t):
+                logger.warning(f"FCM_TOPICS의 잘못된 토픽 무시: {t!r}")
+                continue
+            topics.append(t)
+    if not topics:
+        topics = [DEFAULT_TOPIC]
+    # 순서를 유지하며 중복 제거
+    return list(dict.fromkeys(topics))
+
+
+def _group_topics_by_date_key(topics: List[str]) -> Dict[str, List[str]]:
+    """토픽을 현지 날짜 키(MMDD) 기준으로 묶음"""
+    groups: Dict[str, List[str]] = {}
+    for topic in topics:
+        date_key = resolve_date_key(_resolve_topic_offset_hours(topic))
+        groups.setdefault(date_key, []).append(topic)
+    return groups
+
+
+def _get_prerendered_notification(topics: List[str]) -> Optional[RenderedNotification]:
+    """토픽 현지 오늘 날짜의 사전 생성 알림 (같은 날짜 키로 묶인 토픽 중 먼저 찾은 것)"""
+    for topic in topics:
+        local_date = resolve_local_datetime(_resolve_topic_offset_hours(topic)).date().isoformat()
+        rendered = prerendered_store.get(topic, local_date)
+        if rendered:
+            return rendered
+    return None
+
+
+def prerender_notifications(days: int = PRERENDER_DAYS, topics: Optional[List[str]] = None, image_url: Optional[str] = None, snapshot_path: Optional[str] = PRERENDER_SNAPSHOT_PATH) -> List[RenderedNotification]:
+    """토픽별 향후 days일 알림을 생성해 스냅샷 교체 (snapshot_path가 있으면 파일로도 저장)
+
+    가능하면 daily_events 전체를 한 번에 적재해 날짜별 조회 없이 생성하고,
+    메시지 템플릿도 미리 만들어 전송 시점에는 조회와 전송만 남깁니다.
+    """
+    topics = _resolve_target_topics({"topics": topics})
+    client = get_supabase_client()
+    if client and not _is_event_store_usable():
+        load_event_store(client)
+
+    def _lookup(date_key: str, offset_hours: int, topic: str) -> Optional[Dict[str, str]]:
+        if not client and not _is_event_store_usable():
+            return None
+        return get_event_for_date_key(client, date_key, offset_hours, topic)
+
+    rendered = render_notifications(topics, days, _resolve_topic_offset_hours, _lookup, image_url)
+    for n in rendered:
+        message_templates.get_template(n.date_key, n.topic, n.image_url, n.title, n.body)
+
+    prerendered_store.replace(rendered)
+    if snapshot_path:
+        prerendered_store.save(snapshot_path)
+    logger.info(f"알림 사전 생성 완료 ({len(rendered)}건, {days}일, topics={topics})")
+    return rendered
+
+
+@app.post("/prerender")
+async def prerender(request: Request):
+    """토픽별 향후 N일 알림 페이로드 사전 생성 (Cloud Scheduler로 매일 호출)
+
+    요청 바디(선택): {"days": 2, "topics": [...], "image_url": "..."}. Pub/Sub Push envelope도 허용합니다.
+    """
+    try:
+        payload = await request.json()
+    except Exception:
+        payload = {}
+    options = _extract_pubsub_options(payload)
+
+    try:
+        days = int(options.get("days", PRERENDER_DAYS))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid days")
+    if not 1 <= days <= 31:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 31")
+
+    try:
+        topics = _resolve_target_topics(options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        rendered = await run_blocking(prerender_notifications, days, topics, options.get("image_url") or None)
+    except Exception as e:
+        logger.error(f"알림 사전 생성 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail="Prerender failed")
+
+    return {
+        "status": "success",
+        "count": len(rendered),
+        "days": days,
+        "local_dates": prerendered_store.local_dates(),
+        "generated_at": datetime.utcfromtimestamp(prerendered_store.generated_at).isoformat(),
     }
 
 
 @app.post("/pong")
 async def handle_pubsub_and_notify_fcm(request: Request):
-    """Pub/Sub 메시지를 수신하면 FCM 토픽("history_9_kr")으로 알림을 전송"""
-    try:
-        # Firebase Admin 준비
-        if not firebase_admin._apps:
-            initialized = initialize_firebase_app()
-            if not initialized:
-                raise HTTPException(status_code=500, detail="Firebase not initialized")
+    """Pub/Sub 메시지를 수신하면 FCM 토픽(기본 "history_9_kr")으로 알림을 전송
 
-        # 요청 페이로드(있다면) 로깅용으로만 사용
+    요청 바디(또는 Pub/Sub message.data)의 topics 목록이나 FCM_TOPICS 환경변수로
+    여러 시간대 토픽에 한 번에 발송할 수 있습니다. 토픽은 현지 날짜 키 기준으로 묶여
+    날짜별로 한 번만 이벤트를 조회하고, 메시지는 send_each로 일괄 전송됩니다.
+    이미 처리한 Pub/Sub messageId의 재전송은 중복 알림 없이 바로 ack합니다.
+    """
+    pubsub_message_id: Optional[str] = None
+    pong_started = time.perf_counter()
+    try:
+        # 요청 페이로드(있다면) 로깅 및 옵션(topics, image_url)으로 사용
         try:
             payload = await request.json()
             logger.info(f"/pong 수신 페이로드: {payload}")
         except Exception:
             payload = {}
 
+        # 이미 처리한 Pub/Sub 메시지의 재전송이면 Supabase/FCM 작업 없이 바로 ack
+        pubsub_message_id = _extract_pubsub_message_id(payload)
+        if pubsub_message_id and not dedup_store.claim(pubsub_message_id):
+            metrics.PUBSUB_DUPLICATES.inc()
+            logger.info(f"중복 Pub/Sub 메시지 무시 (messageId={pubsub_message_id})")
+            return {"status": "duplicate", "pubsub_message_id": pubsub_message_id, "results": []}
 
-        # Supabase에서 오늘의 이벤트 조회 시도 (성공 시 payload 대신 사용)
-        topic_name = "history_9_kr"
-        supabase = get_supabase_client()
-        event_texts = get_today_event_from_supabase(supabase, topic_name) if supabase else None
+        # Firebase Admin 준비 (SDK 임포트가 이벤트 루프를 막지 않도록 스레드에서 확인/초기화)
+        if not await run_blocking(initialize_firebase_app):
+            raise HTTPException(status_code=500, detail="Firebase not initialized")
 
-        # 우선순위: Supabase 결과 > 요청 바디 값 > 기본값
-        notif_title = event_texts.get("title") if event_texts else "오늘의 역사"
-        notif_body = event_texts.get("body") if event_texts else "오늘은 무슨 일이 있었을까요?"
+        options = _extract_pubsub_options(payload)
 
         # 이미지 URL은 요청값 우선, 없으면 기본값 사용
-        image_url = (payload.get("image_url") if isinstance(payload, dict) else None) or None
-
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=notif_title,
-                body=notif_body,
-                image=image_url,
-            ),
-            data={
-                "event": "pubsub_received",
-                "timestamp": datetime.utcnow().isoformat(),
-            },
-            android=messaging.AndroidConfig(
-                notification=messaging.AndroidNotification(
-                    image=image_url,
-                )
-            ),
-            apns=messaging.APNSConfig(
-                payload=messaging.APNSPayload(
-                    aps=messaging.Aps(
-                        mutable_content=True,
-                    )
-                ),
-                fcm_options=messaging.APNSFCMOptions(
-                    image=image_url,
-                )
-            ),
-            webpush=messaging.WebpushConfig(
-                notification=messaging.WebpushNotification(
-                    image=image_url,
-                )
-            ),
-            topic=topic_name,
-        )
-        message_id = messaging.send(message)
-        logger.info(f"FCM 전송 성공. message_id={message_id}")
-        return {"status": "success", "message_id": message_id}
-    except HTTPException:
+        image_url = options.get("image_url") or None
+
+        # 날짜 키별로 한 번씩 Supabase에서 이벤트 조회 (성공 시 기본값 대신 사용)
+        # 동기 supabase-py 호출은 전용 스레드 풀에서 날짜별로 동시에 실행
+        try:
+            topics = _resolve_target_topics(options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        supabase = await run_blocking(get_supabase_client)
+        date_groups = _group_topics_by_date_key(topics)
+
+        async def _lookup(date_key: str, date_topics: List[str]) -> Optional[Dict[str, str]]:
+            # 사전 생성된 알림이 있으면 조회 없이 사용
+            rendered = _get_prerendered_notification(date_topics)
+            if rendered:
+                metrics.EVENT_LOOKUPS.inc(source="prerendered")
+                return {"title": rendered.title, "body": rendered.body, "image_url": rendered.image_url}
+            if not supabase:
+                return None
+            offset_hours = _resolve_topic_offset_hours(date_topics[0])
+            return await run_blocking(get_event_for_date_key, supabase, date_key, offset_hours, date_topics[0])
+
+        date_events = await asyncio.gather(*(_lookup(k, t) for k, t in date_groups.items()))
+
+        messages: List["messaging.Message"] = []
+        message_date_keys: List[str] = []
+        with metrics.MESSAGE_BUILD_SECONDS.time():
+            for (date_key, date_topics), event_texts in zip(date_groups.items(), date_events):
+                # 우선순위: 사전 생성/Supabase 결과 > 기본값
+                if not event_texts:
+                    metrics.DEFAULT_TEXT_FALLBACKS.inc()
+                notif_title = event_texts.get("title") if event_texts else DEFAULT_NOTIFICATION_TITLE
+                notif_body = event_texts.get("body") if event_texts else DEFAULT_NOTIFICATION_BODY
+                # 이미지는 요청값 > 사전 생성 값
+                notif_image_url = image_url or (event_texts.get("image_url") if event_texts else None)
+
+                for topic_name in date_topics:
+                    messages.append(message_templates.build(date_key, topic_name, notif_image_url, notif_title, notif_body))
+                    message_date_keys.append(date_key)
+
+        # send_each로 최대 500건씩 일괄 전송 (실패 메시지만 재시도)
+        sender = FcmBatchSender(max_retries=FCM_MAX_RETRIES)
+        for message in messages:
+            sender.add(message)
+        with metrics.FCM_SEND_SECONDS.time():
+            send_results = await run_blocking(sender.flush)
+
+        results = []
+        for message, date_key, result in zip(messages, message_date_keys, send_results):
+            if not result.success:
+                metrics.FCM_MESSAGES.inc(result="failure")
+                logger.error(f"FCM 전송 실패(topic={message.topic}, attempts={result.attempts}): {str(result.error)}")
+                results.append({"topic": message.topic, "date_key": date_key, "status": "failed", "error": str(result.error)})
+            else:
+                metrics.FCM_MESSAGES.inc(result="success")
+                logger.info(f"FCM 전송 성공(topic={message.topic}). message_id={result.message_id}")
+                results.append({"topic": message.topic, "date_key": date_key, "status": "success", "message_id": result.message_id})
+
+        succeeded = [r for r in results if r["status"] == "success"]
+        if not succeeded:
+            # 전부 실패하면 Pub/Sub가 재전송하도록 5xx 반환
+            raise HTTPException(status_code=500, detail="Failed to send FCM")
+
+        response = {
+            "status": "success" if len(succeeded) == len(results) else "partial_failure",
+            "results": results,
+        }
+        if len(results) == 1:
+            response["message_id"] = succeeded[0]["message_id"]
+        return response
+    except HTTPException as e:
+        # 실패한 메시지는 Pub/Sub 재전송 시 다시 처리되도록 중복 기록 해제
+        # (4xx는 재전송해도 같은 결과이므로 기록을 유지해 재전송을 바로 ack)
+        if pubsub_message_id and e.status_code >= 500:
+            dedup_store.release(pubsub_message_id)
         raise
     except Exception as e:
+        if pubsub_message_id:
+            dedup_store.release(pubsub_message_id)
         logger.error(f"FCM 전송 실패: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to send FCM")
+    finally:
+        metrics.PONG_SECONDS.observe(time.perf_counter() - pong_started)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 텍스트 형식 메트릭 (/pong 단계별 지연시간, 캐시 적중/기본 문구/FCM 실패 카운터)"""
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# /events 응답 캐시 정책 (CDN/클라이언트 재검증용)
+EVENTS_CACHE_MAX_AGE = int(os.environ.get("EVENTS_CACHE_MAX_AGE", 3600))
+# /events 본문과 gzip/br 압축본 캐시 (ETag 기준, 데이터가 바뀌면 ETag도 바뀜)
+events_body_cache = CompressedBodyCache(
+    max_entries=int(os.environ.get("EVENTS_BODY_CACHE_SIZE", 1024)),
+    minimum_size=COMPRESSION_MIN_SIZE,
+)
+DATE_KEY_PATTERN = re.compile(r"^(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])$")
+# /events 요청이 몰려도 daily_events 재적재는 한 번만 실행
+_event_store_load_lock = asyncio.Lock()
+
+
+async def _ensure_event_store_loaded() -> None:
+    """/events 조회 전 인덱스 준비. 적재 전이거나 갱신 주기가 지났으면 다시 적재
+
+    동시에 들어온 요청은 먼저 잠금을 얻은 요청의 적재 결과를 기다렸다가 그대로 사용합니다.
+    """
+    if _is_event_store_usable():
+        return
+
+    async with _event_store_load_lock:
+        # 잠금을 기다리는 동안 다른 요청이 적재를 마쳤으면 다시 적재하지 않음
+        if _is_event_store_usable():
+            return
+        client = await run_blocking(get_supabase_client)
+        if client:
+            await run_blocking(load_event_store, client)
+    if not event_store.is_loaded:
+        raise HTTPException(status_code=503, detail="Event data unavailable")
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[float]) -> bool:
+    """조건부 GET(If-None-Match / If-Modified-Since) 검사"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # 약한 비교: W/ 접두사는 무시
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            from email.utils import parsedate_to_datetime
+
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _cached_json_response(request: Request, cache_key: str, build_body, max_age: int) -> Response:
+    """ETag/Last-Modified/Cache-Control을 붙인 compact JSON 응답
+
+    변경이 없으면 본문을 만들지 않고 304를 반환하고, 본문과 압축본은 ETag별로 캐시하여
+    같은 데이터 요청에는 직렬화/압축을 다시 하지 않습니다.
+    """
+    from email.utils import formatdate
+
+    # 인코딩별 표현이 달라지므로 약한 ETag 사용
+    etag = f'W/"{event_store.version}-{cache_key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    if event_store.modified_at is not None:
+        headers["Last-Modified"] = formatdate(event_store.modified_at, usegmt=True)
+
+    if _is_not_modified(request, etag, event_store.modified_at):
+        return Response(status_code=304, headers=headers)
+
+    def _encode_body() -> bytes:
+        return json.dumps(build_body(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    body, encoding = events_body_cache.get(etag, _encode_body, choose_encoding(request.headers.get("accept-encoding")))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _validate_date_key(date_key: str, name: str = "date_key") -> str:
+    if not DATE_KEY_PATTERN.match(date_key):
+        raise HTTPException(status_code=400, detail=f"{name} must be MMDD")
+    return date_key
+
+
+@app.get("/events")
+async def get_events_in_range(
+    request: Request,
+    start: str = Query(..., description="시작 날짜 키(MMDD, 포함)"),
+    end: str = Query(..., description="끝 날짜 키(MMDD, 포함). start보다 작으면 연말을 넘어 순환"),
+):
+    """날짜 범위의 이벤트 목록 (사전 적재 인덱스에서 제공)"""
+    _validate_date_key(start, "start")
+    _validate_date_key(end, "end")
+    await _ensure_event_store_loaded()
+
+    return _cached_json_response(
+        request,
+        f"{start}-{end}",
+        lambda: {"events": event_store.get_range(start, end)},
+        EVENTS_CACHE_MAX_AGE,
+    )
+
+
+@app.get("/events/today")
+async def get_today_event(
+    request: Request,
+    topic: str = Query(DEFAULT_TOPIC, description="시간대 토픽명 (예: history_9_kr)"),
+):
+    """토픽 시간대 기준 오늘의 이벤트. 현지 자정까지만 캐시되도록 max-age 조정"""
+    await _ensure_event_store_loaded()
+
+    offset_hours = _resolve_topic_offset_hours(topic)
+    date_key = resolve_date_key(offset_hours)
+    event = event_store.get(date_key)
+    if event is None:
+        raise HTTPException(status_code=404, detail=f"No event for {date_key}")
+
+    max_age = min(EVENTS_CACHE_MAX_AGE, int(seconds_until_local_midnight(offset_hours)))
+    return _cached_json_response(
+        request,
+        date_key,
+        lambda: {"date_key": date_key, **event},
+        max_age,
+    )
+
+
+@app.get("/events/{date_key}")
+async def get_event_by_date_key(request: Request, date_key: str):
+    """특정 날짜(MMDD)의 이벤트"""
+    _validate_date_key(date_key)
+    await _ensure_event_store_loaded()
+
+    event = event_store.get(date_key)
+    if event is None:
+        raise HTTPException(status_code=404, detail=f"No event for {date_key}")
+
+    return _cached_json_response(
+        request,
+        date_key,
+        lambda: {"date_key": date_key, **event},
+        EVENTS_CACHE_MAX_AGE,
+    )
 
 
 @app.get("/")
 async def root():
     """API 정보를 반환하는 루트 엔드포인트"""
-    supabase_enabled = get_supabase_client() is not None
+    supabase_enabled = _supabase_status() == "connected"
 
     return {
         "message": "오늘의 역사 API on Google Cloud Run",
         "version": "1.0.0",
         "endpoints": {
             "ping": "/ping - 헬스체크",
+            "metrics": "/metrics - Prometheus 메트릭",
+            "events": "/events/{date_key}, /events/today, /events?start=&end= - 날짜별 이벤트 조회",
+            "prerender": "POST /prerender - 토픽별 향후 N일 알림 사전 생성",
             "docs": "/docs - API 문서 (Swagger UI)",
             "redoc": "/redoc - API 문서 (ReDoc)"
         },
@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, NamedTuple, Optional, Tuple
+
+# firebase_admin은 콜드 스타트 비용을 줄이기 위해 실제 메시지 생성 시점에 임포트
+if TYPE_CHECKING:
+    from firebase_admin import messaging
+
+
+def build_fcm_message(title: str, body: str, image_url: Optional[str], topic_name: str) -> "messaging.Message":
+    """토픽 알림 메시지를 매번 새로 생성 (템플릿 미사용)"""
+    from firebase_admin import messaging
+
+    return messaging.Message(
+        notification=messaging.Notification(
+            title=title,
+            body=body,
+            image=image_url,
+        ),
+        data={
+            "event": "pubsub_received",
+            "timestamp": datetime.utcnow().isoformat(),
+        },
+        android=messaging.AndroidConfig(
+            notification=messaging.AndroidNotification(
+                image=image_url,
+            )
+        ),
+        apns=messaging.APNSConfig(
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(
+                    mutable_content=True,
+                )
+            ),
+            fcm_options=messaging.APNSFCMOptions(
+                image=image_url,
+            )
+        ),
+        webpush=messaging.WebpushConfig(
+            notification=messaging.WebpushNotification(
+                image=image_url,
+            )
+        ),
+        topic=topic_name,
+    )
+
+
+class _MessageTemplate(NamedTuple):
+    title: str
+    body: str
+    notification: "messaging.Notification"
+    android: "messaging.AndroidConfig"
+    apns: "messaging.APNSConfig"
+    webpush: "messaging.WebpushConfig"
+
+
+class FcmMessageTemplateCache:
+    """(date_key, topic, image_url)별 FCM 메시지 템플릿 캐시
+
+    Notification/AndroidConfig/APNSConfig/WebpushConfig는 한 번만 만들어 재사용하고,
+    전송마다 data의 timestamp만 새로 찍은 Message를 만듭니다. SDK는 이 객체들을 읽기만
+    하므로 여러 메시지가 공유해도 안전합니다. 같은 키라도 title/body가 바뀌면 다시 만듭니다.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._templates: "OrderedDict[Tuple[str, str, Optional[str]], _MessageTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create_template(self, title: str, body: str, image_url: Optional[str]) -> _MessageTemplate:
+        from firebase_admin import messaging
+
+        return _MessageTemplate(
+            title=title,
+            body=body,
+            notification=messaging.Notification(title=title, body=body, image=image_url),
+            android=messaging.AndroidConfig(
+                notification=messaging.AndroidNotification(image=image_url)
+            ),
+            apns=messaging.APNSConfig(
+                payload=messaging.APNSPayload(aps=messaging.Aps(mutable_content=True)),
+                fcm_options=messaging.APNSFCMOptions(image=image_url),
+            ),
+            webpush=messaging.WebpushConfig(
+                notification=messaging.WebpushNotification(image=image_url)
+            ),
+        )
+
+    def get_template(self, date_key: str, topic_name: str, image_url: Optional[str], title: str, body: str) -> _MessageTemplate:
+        """캐시된 템플릿 반환. 없거나 문구가 바뀌었으면 새로 만들어 저장"""
+        key = (date_key, topic_name, image_url)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None and template.title == title and template.body == body:
+                self._templates.move_to_end(key)
+                return template
+
+        template = self._create_template(title, body, image_url)
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template
+
+    def build(self, date_key: str, topic_name: str, image_url: Optional[str], title: str, body: str) -> "messaging.Message":
+        """템플릿에 현재 timestamp를 찍어 전송용 메시지 생성"""
+        from firebase_admin import messaging
+
+        template = self.get_template(date_key, topic_name, image_url, title, body)
+        return messaging.Message(
+            notification=template.notification,
+            data={
+                "event": "pubsub_received",
+                "timestamp": datetime.utcnow().isoformat(),
+            },
+            android=template.android,
+            apns=template.apns,
+            webpush=template.webpush,
+            topic=topic_name,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._templates)
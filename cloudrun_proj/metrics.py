@@ -0,0 +1,144 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# 지연시간 히스토그램 기본 버킷 (초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+class Counter:
+    """단조 증가 카운터 (레이블별 값 유지)"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items:
+            items = [((), 0)]
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """고정 버킷 히스토그램. 관측당 비용은 이진 탐색 1회와 잠금 1회"""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self):
+        """with 블록 실행 시간을 관측 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return self._count
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            total_count = self._count
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total_count}')
+        lines.append(f"{self.name}_sum {total_sum}")
+        lines.append(f"{self.name}_count {total_count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보낼 메트릭 모음"""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        metric = Counter(name, documentation)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# /pong 단계별 지연시간
+SUPABASE_LOOKUP_SECONDS = registry.histogram(
+    "honey_supabase_lookup_seconds", "Supabase daily_events 조회 시간(초)")
+MESSAGE_BUILD_SECONDS = registry.histogram(
+    "honey_fcm_message_build_seconds", "/pong 한 번의 FCM 메시지 생성 시간(초)")
+FCM_SEND_SECONDS = registry.histogram(
+    "honey_fcm_send_seconds", "/pong 한 번의 FCM 일괄 전송 시간(초, 재시도 포함)")
+PONG_SECONDS = registry.histogram(
+    "honey_pong_seconds", "/pong 전체 처리 시간(초)")
+
+# 조회/전송 결과 카운터
+EVENT_LOOKUPS = registry.counter(
+    "honey_event_lookups_total", "오늘의 이벤트 조회 수 (source=prerendered|store|cache|supabase|stale|missing|error)")
+DEFAULT_TEXT_FALLBACKS = registry.counter(
+    "honey_default_text_fallbacks_total", "이벤트가 없어 기본 문구로 보낸 날짜 그룹 수")
+FCM_MESSAGES = registry.counter(
+    "honey_fcm_messages_total", "FCM 메시지 전송 결과 수 (result=success|failure)")
+SUPABASE_CIRCUIT_REJECTIONS = registry.counter(
+    "honey_supabase_circuit_rejections_total", "Supabase 차단기가 열려 조회를 생략한 수")
+PUBSUB_DUPLICATES = registry.counter(
+    "honey_pubsub_duplicates_total", "중복으로 무시한 Pub/Sub 메시지 수")
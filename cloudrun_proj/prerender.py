@@ -0,0 +1,137 @@
+"""토픽별 향후 N일 알림 페이로드(title/body/image) 사전 생성
+
+/pong은 전송 시점에 스냅샷을 먼저 찾고, 없을 때만 Supabase를 조회합니다.
+앱의 POST /prerender 엔드포인트나 아래 CLI로 실행합니다.
+
+사용 예:
+    python prerender.py --days 2 --output prerendered.json
+    python prerender.py --days 3 --topics history_9_kr history_-5_us --image-url https://example.com/banner.png
+"""
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from event_cache import resolve_local_datetime
+
+
+class RenderedNotification(NamedTuple):
+    topic: str
+    local_date: str  # 토픽 현지 날짜 (YYYY-MM-DD)
+    date_key: str  # MMDD
+    title: str
+    body: str
+    image_url: Optional[str]
+
+
+def render_notifications(
+    topics: Iterable[str],
+    days: int,
+    resolve_offset: Callable[[str], int],
+    lookup: Callable[[str, int, str], Optional[Dict[str, str]]],
+    image_url: Optional[str] = None,
+    now=None,
+) -> List[RenderedNotification]:
+    """토픽마다 현지 오늘부터 days일치 알림을 생성
+
+    lookup(date_key, offset_hours, topic)은 날짜 키마다 한 번만 호출합니다.
+    이벤트가 없는 날짜는 건너뛰어 전송 시점에 다시 조회하도록 둡니다.
+    """
+    events: Dict[str, Optional[Dict[str, str]]] = {}
+    rendered: List[RenderedNotification] = []
+    for topic in topics:
+        offset_hours = resolve_offset(topic)
+        local_today = resolve_local_datetime(offset_hours, now)
+        for day in range(days):
+            local_date = local_today + timedelta(days=day)
+            date_key = local_date.strftime('%m%d')
+            if date_key not in events:
+                events[date_key] = lookup(date_key, offset_hours, topic)
+            event = events[date_key]
+            if not event:
+                continue
+            rendered.append(RenderedNotification(
+                topic=topic,
+                local_date=local_date.date().isoformat(),
+                date_key=date_key,
+                title=event["title"],
+                body=event["body"],
+                image_url=image_url,
+            ))
+    return rendered
+
+
+class PrerenderedStore:
+    """(토픽, 현지 날짜)별 사전 생성 알림 저장소
+
+    - replace()는 스냅샷 전체를 한 번에 교체합니다
+    - save()/load()로 JSON 스냅샷 파일에 보관하여 새 인스턴스도 바로 사용할 수 있습니다
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], RenderedNotification] = {}
+        self.generated_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def replace(self, notifications: Iterable[RenderedNotification], generated_at: Optional[float] = None) -> None:
+        entries = {(n.topic, n.local_date): n for n in notifications}
+        with self._lock:
+            self._entries = entries
+            self.generated_at = generated_at or time.time()
+
+    def get(self, topic: str, local_date: str) -> Optional[RenderedNotification]:
+        with self._lock:
+            return self._entries.get((topic, local_date))
+
+    def local_dates(self) -> List[str]:
+        with self._lock:
+            return sorted({local_date for _, local_date in self._entries})
+
+    def save(self, path: str) -> None:
+        """스냅샷을 JSON으로 저장 (임시 파일에 쓴 뒤 교체)"""
+        with self._lock:
+            data = {
+                "generated_at": self.generated_at,
+                "notifications": [n._asdict() for n in self._entries.values()],
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """JSON 스냅샷을 읽어 교체. 적재한 항목 수 반환"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        notifications = [RenderedNotification(**n) for n in data.get("notifications", [])]
+        self.replace(notifications, data.get("generated_at"))
+        return len(notifications)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="토픽별 향후 N일 알림 페이로드 사전 생성")
+    parser.add_argument("--days", type=int, default=int(os.environ.get("PRERENDER_DAYS", 2)), help="생성할 일수 (기본값: PRERENDER_DAYS 또는 2)")
+    parser.add_argument("--topics", nargs="+", help="대상 토픽 (기본값: FCM_TOPICS 또는 기본 토픽)")
+    parser.add_argument("--image-url", help="알림 이미지 URL")
+    parser.add_argument("--output", default=os.environ.get("PRERENDER_SNAPSHOT_PATH", "prerendered.json"), help="스냅샷 파일 경로")
+    args = parser.parse_args()
+
+    # Supabase 클라이언트/이벤트 조회 로직은 앱과 공유
+    import main as app_main
+
+    rendered = app_main.prerender_notifications(args.days, args.topics, args.image_url, snapshot_path=args.output)
+    print(f"✅ {len(rendered)}건 사전 생성 → {args.output}")
+    for n in rendered:
+        print(f"  {n.topic:<20} {n.local_date} {n.title}")
+
+
+if __name__ == "__main__":
+    main()
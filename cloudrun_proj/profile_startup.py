@@ -0,0 +1,136 @@
+"""Cloud Run 콜드 스타트 프로파일링 도구
+
+1) 임포트 시간: `python -X importtime -c "import main"` 결과를 최상위 패키지별로 집계하고, SDK 모듈은 모듈별 누적 시간 측정
+2) 첫 요청까지 시간: uvicorn 프로세스를 새로 띄운 시점부터 /ping이 처음 200을 반환할 때까지 측정
+
+사용 예:
+    python profile_startup.py                    # 임포트 시간 + 즉시/지연 초기화 비교
+    python profile_startup.py --runs 5 --top 15
+    python profile_startup.py --modules supabase firebase_admin.messaging
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _run_importtime(statement: str):
+    """새 인터프리터에서 statement를 -X importtime으로 실행하고 [(모듈, 자체 ms, 누적 ms)] 반환"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"임포트 실패: {result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)) / 1000, int(match.group(2)) / 1000))
+    return rows
+
+
+def measure_import_times(statement: str):
+    """statement 실행 중 임포트된 모듈을 최상위 패키지별로 집계
+
+    반환값: {패키지: (자체 합계 ms, 최대 단일 누적 ms)}
+    - 자체 합계: 패키지에 속한 모든 모듈의 자체 실행 시간 합 (패키지가 직접 쓴 시간)
+    - 최대 단일 누적: 패키지 모듈 한 번의 임포트가 하위/다른 패키지 임포트까지 포함해 걸린 가장 긴 시간.
+      패키지가 여러 곳에서 나눠 임포트되면 자체 합계보다 작을 수 있습니다
+    """
+    totals = {}
+    for name, self_ms, cumulative_ms in _run_importtime(statement):
+        package = name.split(".")[0]
+        self_total_ms, max_cumulative_ms = totals.get(package, (0.0, 0.0))
+        totals[package] = (self_total_ms + self_ms, max(max_cumulative_ms, cumulative_ms))
+    return totals
+
+
+def measure_module_import_time(module: str) -> float:
+    """새 인터프리터에서 module을 임포트할 때 해당 모듈 자체 줄의 누적 시간(ms)
+
+    하위 모듈(예: firebase_admin.messaging)은 상위 패키지 초기화가 먼저 별도 줄로 기록되므로
+    상위 패키지 임포트 시간을 제외한, 그 모듈을 추가로 불러오는 비용입니다.
+    """
+    for name, _, cumulative_ms in _run_importtime(f"import {module}"):
+        if name == module:
+            return cumulative_ms
+    raise RuntimeError(f"importtime 출력에 {module} 항목 없음")
+
+
+def measure_time_to_first_request(env_overrides, timeout: float = 60):
+    """uvicorn 프로세스 시작부터 /ping 첫 성공 응답까지 걸린 시간(초)"""
+    port = _free_port()
+    env = dict(os.environ, **env_overrides)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=HERE,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn 프로세스 종료 (code={process.returncode})")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ping", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"{timeout}초 내에 /ping 응답 없음")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cloud Run 콜드 스타트 프로파일링")
+    parser.add_argument("--runs", type=int, default=3, help="첫 요청 시간 측정 반복 횟수 (기본값: 3)")
+    parser.add_argument("--top", type=int, default=10, help="출력할 임포트 상위 항목 수 (기본값: 10)")
+    parser.add_argument("--modules", nargs="*", default=["supabase", "firebase_admin", "firebase_admin.messaging"],
+                        help="개별 임포트 시간을 측정할 모듈")
+    args = parser.parse_args()
+
+    print("📦 main 임포트 시간 (패키지별 자체 합계 / 최대 단일 누적)")
+    totals = measure_import_times("import main")
+    ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+    for package, (self_total_ms, max_cumulative_ms) in ranked[:args.top]:
+        print(f"  {package:<28} {self_total_ms:9.1f} ms / {max_cumulative_ms:9.1f} ms")
+
+    print("\n📦 SDK 개별 임포트 시간 (첫 사용 시 지연 로드되는 비용, 하위 모듈은 상위 패키지 제외)")
+    for module in args.modules:
+        try:
+            ms = measure_module_import_time(module)
+            print(f"  {module:<28} {ms:9.1f} ms")
+        except RuntimeError as e:
+            print(f"  {module:<28} 측정 실패: {e}")
+
+    print("\n⏱️ 프로세스 시작 → 첫 /ping 응답")
+    for label, lazy in (("즉시 초기화", "false"), ("지연 초기화(LAZY_INIT)", "true")):
+        samples = [measure_time_to_first_request({"LAZY_INIT": lazy}) * 1000 for _ in range(args.runs)]
+        print(f"  {label:<24} median={statistics.median(samples):8.1f} ms  min={min(samples):8.1f} ms  max={max(samples):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import unittest
+import time
+from unittest.mock import patch, MagicMock
+import main
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from event_cache import DailyEventCache, DailyEventStore
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """서킷 브레이커 상태 전이 테스트 (시간은 time.monotonic 패치로 제어)"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.now = 1000.0
+        patcher = patch('circuit_breaker.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout_seconds=30)
+
+    def _fail(self):
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(MagicMock(side_effect=RuntimeError("timeout")))
+
+    def _open(self):
+        for _ in range(self.breaker.failure_threshold):
+            self._fail()
+
+    def test_opens_at_threshold(self):
+        """연속 실패가 임계값에 도달해야 open이 되고, open이면 호출하지 않는지 테스트"""
+        self._fail()
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        func = MagicMock()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(func)
+        func.assert_not_called()
+
+    def test_success_resets_failure_count(self):
+        """중간에 성공하면 연속 실패 수가 초기화되는지 테스트"""
+        self._fail()
+        self._fail()
+        self.breaker.call(lambda: "ok")
+        self._fail()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_after_reset_timeout(self):
+        """reset 시간이 지나면 half_open이 되고 시험 호출이 성공하면 closed로 돌아가는지 테스트"""
+        self._open()
+        self.now += 29.9
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.now += 0.1
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        """half_open에서는 시험 호출 하나만 허용하는지 테스트"""
+        self._open()
+        self.now += 30
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_failed_probe_reopens(self):
+        """시험 호출이 실패하면 임계값과 관계없이 다시 open되고 reset 시간을 새로 기다리는지 테스트"""
+        self._open()
+        self.now += 30
+        self._fail()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.now += 29
+        self.assertFalse(self.breaker.allow_request())
+        self.now += 1
+        self.assertTrue(self.breaker.allow_request())
+
+
+class TestSupabaseFallback(unittest.TestCase):
+    """차단기가 열렸을 때 get_event_for_date_key의 대체 경로 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정: 새 캐시/인덱스와 열린 차단기로 교체"""
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=60)
+        self.breaker.record_failure()
+        self.event_cache = DailyEventCache(max_ttl_seconds=3600)
+        self.fetch = MagicMock()
+        for name, value in (
+            ("supabase_breaker", self.breaker),
+            ("event_cache", self.event_cache),
+            ("event_store", DailyEventStore()),
+            ("_fetch_event_from_supabase", self.fetch),
+        ):
+            patcher = patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_open_breaker_uses_stale_entry(self):
+        """만료된 캐시 항목이 있으면 Supabase를 호출하지 않고 그 항목을 반환하는지 테스트"""
+        event = {"title": "t", "body": "b"}
+        self.event_cache.set("0101", event, 9)
+        with patch('event_cache.time.time', return_value=time.time() + 7200):
+            self.assertIsNone(self.event_cache.get("0101"))
+
+            result = main.get_event_for_date_key(MagicMock(), "0101", 9, "history_9_kr")
+
+        self.assertEqual(result, event)
+        self.fetch.assert_not_called()
+
+    def test_open_breaker_without_stale_entry(self):
+        """대체할 항목이 없으면 None(기본 문구)을 반환하는지 테스트"""
+        self.assertIsNone(main.get_event_for_date_key(MagicMock(), "0101", 9, "history_9_kr"))
+        self.fetch.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import gzip
+from email.utils import formatdate
+from unittest.mock import patch, MagicMock
+from starlette.requests import Request
+import compressed_cache
+import main
+from compressed_cache import CompressedBodyCache, choose_encoding
+
+
+def _request(**headers):
+    """헤더만 있는 GET 요청"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+class TestChooseEncoding(unittest.TestCase):
+    """Accept-Encoding 협상 테스트"""
+
+    def test_prefers_br_when_available(self):
+        """brotli가 있으면 br > gzip 순서로 선택하는지 테스트"""
+        with patch('compressed_cache.brotli', MagicMock()):
+            self.assertEqual(choose_encoding("gzip, deflate, br"), "br")
+            self.assertEqual(choose_encoding("*"), "br")
+            self.assertEqual(choose_encoding("br;q=0, gzip"), "gzip")
+
+    def test_gzip_without_brotli(self):
+        """brotli가 없으면 br을 요청해도 gzip을 선택하는지 테스트"""
+        with patch('compressed_cache.brotli', None):
+            self.assertEqual(choose_encoding("br, gzip"), "gzip")
+            self.assertEqual(choose_encoding("br"), "identity")
+            self.assertEqual(choose_encoding("*"), "gzip")
+
+    def test_quality_and_missing_header(self):
+        """q=0 거부, 잘못된 q값, 헤더 없음/대소문자 처리 테스트"""
+        self.assertEqual(choose_encoding(None), "identity")
+        self.assertEqual(choose_encoding(""), "identity")
+        self.assertEqual(choose_encoding("gzip;q=0"), "identity")
+        self.assertEqual(choose_encoding("gzip;q=abc"), "identity")
+        self.assertEqual(choose_encoding("GZIP ; q=0.5"), "gzip")
+        self.assertEqual(choose_encoding("deflate"), "identity")
+
+
+class TestCompressedBodyCache(unittest.TestCase):
+    """본문/압축본 캐시 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.body = b'{"events":[' + b'{"title":"t","body":"b"},' * 100 + b']}'
+        self.build = MagicMock(return_value=self.body)
+        self.cache = CompressedBodyCache(max_entries=2, minimum_size=64)
+
+    def test_builds_once_per_key(self):
+        """같은 키는 본문을 한 번만 만들고 인코딩별로 재사용하는지 테스트"""
+        identity, _ = self.cache.get("k1", self.build, "identity")
+        compressed, encoding = self.cache.get("k1", self.build, "gzip")
+        again, _ = self.cache.get("k1", self.build, "gzip")
+
+        self.assertEqual(identity, self.body)
+        self.assertEqual(encoding, "gzip")
+        self.assertEqual(gzip.decompress(compressed), self.body)
+        self.assertIs(again, compressed)
+        self.build.assert_called_once()
+
+    @unittest.skipIf(compressed_cache.brotli is None, "brotli 미설치")
+    def test_brotli_roundtrip(self):
+        """br 압축본이 원본으로 복원되는지 테스트"""
+        compressed, encoding = self.cache.get("k1", self.build, "br")
+
+        self.assertEqual(encoding, "br")
+        self.assertEqual(compressed_cache.brotli.decompress(compressed), self.body)
+
+    def test_small_body_not_compressed(self):
+        """minimum_size보다 작은 본문은 압축하지 않는지 테스트"""
+        body, encoding = self.cache.get("k1", lambda: b"{}", "gzip")
+
+        self.assertEqual((body, encoding), (b"{}", "identity"))
+
+    def test_max_entries(self):
+        """최대 항목 수를 넘으면 가장 오래 쓰지 않은 키부터 제거하는지 테스트"""
+        for key in ("k1", "k2", "k1", "k3"):
+            self.cache.get(key, self.build, "identity")
+
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get("k1", self.build, "identity")
+        self.assertEqual(self.build.call_count, 3)
+
+
+class TestIsNotModified(unittest.TestCase):
+    """조건부 GET(If-None-Match / If-Modified-Since) 검사 테스트"""
+
+    ETAG = 'W/"abc-0101"'
+    MODIFIED_AT = 1700000000.0
+
+    def test_if_none_match(self):
+        """약한 비교, 목록, * 처리 테스트"""
+        self.assertTrue(main._is_not_modified(_request(if_none_match=self.ETAG), self.ETAG, None))
+        self.assertTrue(main._is_not_modified(_request(if_none_match='"abc-0101"'), self.ETAG, None))
+        self.assertTrue(main._is_not_modified(_request(if_none_match='"other", W/"abc-0101"'), self.ETAG, None))
+        self.assertTrue(main._is_not_modified(_request(if_none_match="*"), self.ETAG, None))
+        self.assertFalse(main._is_not_modified(_request(if_none_match='W/"abc-0102"'), self.ETAG, None))
+
+    def test_if_none_match_takes_precedence(self):
+        """If-None-Match가 있으면 If-Modified-Since는 무시하는지 테스트"""
+        request = _request(
+            if_none_match='W/"stale"',
+            if_modified_since=formatdate(self.MODIFIED_AT + 60, usegmt=True),
+        )
+
+        self.assertFalse(main._is_not_modified(request, self.ETAG, self.MODIFIED_AT))
+
+    def test_if_modified_since(self):
+        """수정 시각 이후/이전 날짜와 잘못된 날짜 처리 테스트"""
+        def check(header):
+            return main._is_not_modified(_request(if_modified_since=header), self.ETAG, self.MODIFIED_AT)
+
+        self.assertTrue(check(formatdate(self.MODIFIED_AT, usegmt=True)))
+        self.assertTrue(check(formatdate(self.MODIFIED_AT + 60, usegmt=True)))
+        self.assertFalse(check(formatdate(self.MODIFIED_AT - 60, usegmt=True)))
+        self.assertFalse(check("not a date"))
+        self.assertFalse(main._is_not_modified(_request(if_modified_since=formatdate(self.MODIFIED_AT, usegmt=True)), self.ETAG, None))
+
+    def test_no_conditional_headers(self):
+        """조건부 헤더가 없으면 False인지 테스트"""
+        self.assertFalse(main._is_not_modified(_request(), self.ETAG, self.MODIFIED_AT))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+from dedup_store import InMemoryLRUDedupStore
+
+
+class TestInMemoryLRUDedupStore(unittest.TestCase):
+    """Pub/Sub messageId 중복 방지 저장소 테스트 (시간은 time.monotonic 패치로 제어)"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.now = 1000.0
+        patcher = patch('dedup_store.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = InMemoryLRUDedupStore(max_entries=3, ttl_seconds=60)
+
+    def test_claim_once(self):
+        """같은 키는 처음 한 번만 claim되는지 테스트"""
+        self.assertTrue(self.store.claim("m1"))
+        self.assertFalse(self.store.claim("m1"))
+        self.assertTrue(self.store.claim("m2"))
+
+    def test_ttl_expiry(self):
+        """TTL이 지나면 기록이 만료되어 다시 claim할 수 있는지 테스트"""
+        self.store.claim("m1")
+        self.now += 30
+        self.store.claim("m2")
+
+        self.now += 29.9
+        self.assertFalse(self.store.claim("m1"))
+
+        self.now += 0.1
+        self.assertTrue(self.store.claim("m1"))
+        # 나중에 기록한 m2는 아직 유효
+        self.assertFalse(self.store.claim("m2"))
+
+    def test_expired_entries_evicted(self):
+        """만료된 항목은 다음 claim 때 제거되는지 테스트"""
+        self.store.claim("m1")
+        self.store.claim("m2")
+        self.now += 60
+        self.store.claim("m3")
+
+        self.assertEqual(len(self.store), 1)
+
+    def test_lru_cap(self):
+        """최대 항목 수를 넘으면 가장 오래된 기록부터 제거하는지 테스트"""
+        for key in ("m1", "m2", "m3", "m4"):
+            self.assertTrue(self.store.claim(key))
+
+        self.assertEqual(len(self.store), 3)
+        self.assertTrue(self.store.claim("m1"))
+        self.assertFalse(self.store.claim("m4"))
+
+    def test_release(self):
+        """release한 키는 재전송 시 다시 처리할 수 있는지 테스트"""
+        self.store.claim("m1")
+        self.store.release("m1")
+
+        self.assertTrue(self.store.claim("m1"))
+        # 없는 키 release는 무시
+        self.store.release("missing")
+        self.assertEqual(len(self.store), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
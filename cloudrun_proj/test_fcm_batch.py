@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch
+from firebase_admin import exceptions, messaging
+from fcm_batch import FcmBatchSender
+
+
+class TestFcmBatchSender(unittest.TestCase):
+    """send_each 일괄 전송/재시도 테스트 (messaging.send_each를 가짜로 교체)"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        # 토픽 -> 시도마다 돌려줄 결과 목록 (None이면 성공, 예외면 실패). 목록이 끝나면 성공
+        self.outcomes = {}
+        self.calls = []
+        for target, kwargs in (
+            ('firebase_admin.messaging.send_each', {'side_effect': self._fake_send_each}),
+            ('fcm_batch.time.sleep', {}),
+        ):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake_send_each(self, messages, dry_run=False):
+        self.calls.append([m.topic for m in messages])
+        responses = []
+        for message in messages:
+            outcomes = self.outcomes.get(message.topic, [])
+            error = outcomes.pop(0) if outcomes else None
+            if error is None:
+                responses.append(messaging.SendResponse({"name": f"id-{message.topic}"}, None))
+            else:
+                responses.append(messaging.SendResponse(None, error))
+        return messaging.BatchResponse(responses)
+
+    def _sender(self, topics, **kwargs):
+        sender = FcmBatchSender(**kwargs)
+        for topic in topics:
+            sender.add(messaging.Message(topic=topic, notification=messaging.Notification(title="t", body="b")))
+        return sender
+
+    def test_partial_failure_retries_only_retryable(self):
+        """재시도 가능한 오류만 다시 보내고 결과는 add 순서를 유지하는지 테스트"""
+        self.outcomes = {
+            "t1": [exceptions.UnavailableError("unavailable")],
+            "t3": [exceptions.InvalidArgumentError("invalid")],
+        }
+
+        results = self._sender(["t0", "t1", "t2", "t3"]).flush()
+
+        self.assertEqual(self.calls, [["t0", "t1", "t2", "t3"], ["t1"]])
+        self.assertEqual([r.message_id for r in results], ["id-t0", "id-t1", "id-t2", None])
+        self.assertEqual([r.attempts for r in results], [1, 2, 1, 1])
+        self.assertIsInstance(results[3].error, exceptions.InvalidArgumentError)
+
+    def test_retry_limit(self):
+        """계속 실패하면 처음 전송 + max_retries번까지만 시도하는지 테스트"""
+        self.outcomes = {"t0": [exceptions.UnavailableError("unavailable")] * 10}
+
+        results = self._sender(["t0"], max_retries=2).flush()
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertFalse(results[0].success)
+        self.assertEqual(results[0].attempts, 3)
+
+    def test_no_retry_when_max_retries_zero(self):
+        """max_retries=0이면 재시도하지 않는지 테스트"""
+        self.outcomes = {"t0": [exceptions.InternalError("internal")]}
+
+        results = self._sender(["t0"], max_retries=0).flush()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertIsInstance(results[0].error, exceptions.InternalError)
+
+    def test_chunks_of_500_keep_order(self):
+        """500건씩 나누어 보내고 결과 순서가 입력 순서와 같은지 테스트"""
+        topics = [f"t{i}" for i in range(1201)]
+        self.outcomes = {"t700": [exceptions.UnavailableError("unavailable")]}
+
+        results = self._sender(topics).flush()
+
+        self.assertEqual([len(call) for call in self.calls], [500, 500, 201, 1])
+        self.assertEqual(self.calls[-1], ["t700"])
+        self.assertEqual([r.message_id for r in results], [f"id-{t}" for t in topics])
+
+    def test_whole_call_failure(self):
+        """send_each 호출 자체가 실패하면 묶음 전체를 같은 오류로 기록하는지 테스트"""
+        error = ValueError("boom")
+        with patch('firebase_admin.messaging.send_each', side_effect=error):
+            results = self._sender(["t0", "t1"]).flush()
+
+        self.assertEqual([r.error for r in results], [error, error])
+        self.assertEqual([r.attempts for r in results], [1, 1])
+
+    def test_unencodable_message_isolated(self):
+        """인코딩할 수 없는 메시지는 보내지 않고 그 메시지만 실패로 기록하는지 테스트"""
+        results = self._sender(["t0", "bad topic!", "t2"]).flush()
+
+        self.assertEqual(self.calls, [["t0", "t2"]])
+        self.assertTrue(results[0].success)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertEqual(results[1].attempts, 0)
+        self.assertTrue(results[2].success)
+
+    def test_flush_clears_queue(self):
+        """flush 후 대기열이 비워지는지 테스트"""
+        sender = self._sender(["t0"])
+        sender.flush()
+
+        self.assertEqual(len(sender), 0)
+        self.assertEqual(sender.flush(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,380 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+import aiohttp
+
+from comfy_ui_client import PromptExecutionError
+from upload_cache import view_params
+from workflow_processor import MappedWorkflowProcessor
+
+# 완료 이벤트를 놓쳤을 때 대비해 history를 확인하는 간격 (초)
+HISTORY_CHECK_INTERVAL = 30
+
+# /view 스트리밍 다운로드 청크 크기
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# WebSocket이 끊겼을 때 재연결까지 대기 시간 (초)
+RECONNECT_DELAY = 5
+
+
+def create_session(limit=100, limit_per_host=32, timeout=None):
+    """여러 서버/클라이언트가 함께 쓰는 aiohttp 세션 (keep-alive 연결 풀)
+
+    Args:
+        limit: 전체 동시 연결 수
+        limit_per_host: 서버 하나당 동시 연결 수
+        timeout: 요청 전체 제한 시간(초). None이면 제한 없음 (큰 이미지 다운로드)
+    """
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+class AsyncComfyUIClient:
+    """asyncio 기반 ComfyUI 클라이언트
+
+    업로드(/upload/image), 큐 등록(/prompt), 히스토리(/history), 이미지(/view)와 실행 이벤트(/ws)를
+    aiohttp 세션 하나로 처리합니다. 세션을 넘기면 여러 서버의 클라이언트가 같은 연결 풀을 공유하고,
+    스레드 없이 이벤트 루프 하나에서 여러 프롬프트를 동시에 진행할 수 있습니다.
+
+    사용 예:
+        async with create_session() as session:
+            async with AsyncComfyUIClient("127.0.0.1:8188", session) as client:
+                prompt_id = await client.queue_prompt(workflow)
+                history_entry = await client.wait_for_completion(prompt_id)
+    """
+
+    # 대기 등록 전에 끝난 프롬프트 결과를 보관할 최대 개수
+    MAX_FINISHED = 1000
+
+    def __init__(self, server_address="127.0.0.1:8188", session=None, client_id=None):
+        self.server_address = server_address
+        self.base_url = f"http://{server_address}"
+        # /prompt 요청의 client_id와 같아야 이 소켓으로 실행 이벤트를 받음
+        self.client_id = client_id or str(uuid.uuid4())
+        self.session = session
+        self._owns_session = session is None
+        self.connected = asyncio.Event()
+        self._ws_task = None
+        # prompt_id -> 완료 Future / 결과 (None이면 성공, 아니면 에러 메시지)
+        self._waiters = {}
+        self._finished = OrderedDict()
+        # 수신한 이벤트를 (server_address, type, data, 수신 시각)으로 전달받을 콜백 (프로파일링 등)
+        self._listeners = []
+        # 내용 해시 -> 진행 중인 업로드 작업 (동시에 같은 이미지를 여러 번 올리지 않음)
+        self._uploads = {}
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def connect(self):
+        """세션 준비 후 WebSocket 수신 작업 시작 (끊기면 RECONNECT_DELAY초 후 재연결)"""
+        if self.session is None:
+            self.session = create_session()
+        if self._ws_task is None:
+            self._ws_task = asyncio.create_task(self._receive_loop())
+
+    async def close(self):
+        if self._ws_task is not None:
+            self._ws_task.cancel()
+            try:
+                await self._ws_task
+            except asyncio.CancelledError:
+                pass
+            self._ws_task = None
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def wait_until_connected(self, timeout=None):
+        """WebSocket 연결될 때까지 대기. 연결되면 True"""
+        try:
+            await asyncio.wait_for(self.connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def add_listener(self, callback):
+        """WebSocket 이벤트 리스너 등록. 완료 대기를 깨우기 전에 호출됩니다"""
+        self._listeners.append(callback)
+
+    async def _receive_loop(self):
+        while True:
+            try:
+                async with self.session.ws_connect(
+                    f"ws://{self.server_address}/ws", params={"clientId": self.client_id}, heartbeat=30
+                ) as ws:
+                    self.connected.set()
+                    async for message in ws:
+                        # 미리보기 이미지 등 바이너리 메시지는 무시
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            try:
+                                self._handle_message(json.loads(message.data))
+                            except Exception as e:
+                                # 메시지 하나의 처리 실패로 수신 작업이 끝나지 않도록 기록만 하고 계속 수신
+                                print(f"WebSocket 메시지 처리 에러 ({self.server_address}): {e!r}")
+                        elif message.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"WebSocket 에러 ({self.server_address}): {e}")
+            except Exception as e:
+                print(f"WebSocket 수신 에러 ({self.server_address}): {e!r}")
+            finally:
+                # 취소되거나 예외로 끝나도 연결 상태를 남기지 않음 (history 확인 간격이 1초로 돌아감)
+                self.connected.clear()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def _handle_message(self, data):
+        """WebSocket 메시지 처리"""
+        received_at = time.time()
+        for listener in self._listeners:
+            try:
+                listener(self.server_address, data['type'], data.get('data'), received_at)
+            except Exception as e:
+                print(f"WebSocket 리스너 에러 ({self.server_address}, {data.get('type')}): {e!r}")
+        if data['type'] == 'executing':
+            # node가 None이면 해당 프롬프트의 모든 노드 실행 완료
+            if data['data']['node'] is None:
+                self._finish(data['data'].get('prompt_id'))
+        elif data['type'] == 'execution_success':
+            self._finish(data['data'].get('prompt_id'))
+        elif data['type'] in ('execution_error', 'execution_interrupted'):
+            error = data['data'].get('exception_message') or data['type']
+            self._finish(data['data'].get('prompt_id'), error)
+
+    def _finish(self, prompt_id, error=None):
+        """프롬프트 완료 기록 후 대기 중인 작업 깨우기"""
+        if not prompt_id or prompt_id in self._finished:
+            return
+        self._finished[prompt_id] = error
+        while len(self._finished) > self.MAX_FINISHED:
+            self._finished.popitem(last=False)
+        waiter = self._waiters.get(prompt_id)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def wait_for_prompt(self, prompt_id, timeout=None):
+        """prompt_id 실행이 끝날 때까지 대기
+
+        완료 이벤트가 오면 True, timeout 안에 이벤트가 없으면 False를 반환합니다.
+        실행 실패 이벤트를 받으면 PromptExecutionError를 발생시킵니다.
+        """
+        if prompt_id not in self._finished:
+            waiter = self._waiters.setdefault(prompt_id, asyncio.get_running_loop().create_future())
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                if prompt_id in self._finished or waiter.done():
+                    self._waiters.pop(prompt_id, None)
+        error = self._finished.pop(prompt_id, None)
+        if error is not None:
+            raise PromptExecutionError(f"프롬프트 실행 실패 ({prompt_id}): {error}")
+        return True
+
+    async def upload_image(self, image_path, upload_cache=None):
+        """이미지를 2d 폴더로 업로드하고 서버 파일명 반환
+
+        upload_cache가 있으면 WorkflowProcessor.upload_image와 같은 규칙(내용 해시를 붙인 파일명,
+        실행마다 한 번 HEAD /view로 확인)으로 같은 내용은 서버마다 한 번만 올립니다.
+        """
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}")
+
+        filename = os.path.basename(image_path)
+        content_hash = None
+        if upload_cache is not None:
+            content_hash = await asyncio.to_thread(upload_cache.content_hash, image_path)
+            cached_name = upload_cache.get(self.base_url, content_hash)
+            if cached_name and await self._is_uploaded(upload_cache, cached_name, content_hash):
+                return cached_name
+            stem, ext = os.path.splitext(filename)
+            filename = f"{stem}_{content_hash[:12]}{ext}"
+            upload = self._uploads.get(content_hash)
+            if upload is None:
+                upload = asyncio.create_task(self._upload_file(image_path, filename))
+                self._uploads[content_hash] = upload
+            try:
+                uploaded_name = await asyncio.shield(upload)
+            finally:
+                if upload.done():
+                    self._uploads.pop(content_hash, None)
+            upload_cache.set(self.base_url, content_hash, uploaded_name)
+            return uploaded_name
+
+        return await self._upload_file(image_path, filename)
+
+    async def _upload_file(self, image_path, filename):
+        """/upload/image로 2d/{filename} 업로드 후 서버 파일명 반환"""
+        with open(image_path, 'rb') as f:
+            # quote_fields=False: requests처럼 2d/ 경로를 그대로 보냄 (기본값은 2d%2F로 인코딩)
+            form = aiohttp.FormData(quote_fields=False)
+            form.add_field('image', f, filename=f"2d/{filename}", content_type='image/png')
+            form.add_field('overwrite', 'true')
+            async with self.session.post(f"{self.base_url}/upload/image", data=form) as response:
+                if response.status != 200:
+                    raise Exception(f"이미지 업로드 실패: {response.status}")
+                result = await response.json()
+        return result['name']
+
+    async def _is_uploaded(self, upload_cache, uploaded_name, content_hash):
+        """캐시된 파일이 서버 input 폴더에 아직 있는지 확인 (실행마다 한 번)"""
+        if upload_cache.is_verified(self.base_url, content_hash):
+            return True
+        try:
+            async with self.session.head(
+                f"{self.base_url}/view", params=view_params(uploaded_name)
+            ) as response:
+                status = response.status
+        except aiohttp.ClientError:
+            return False
+        if status == 200:
+            upload_cache.mark_verified(self.base_url, content_hash)
+            return True
+        upload_cache.discard(self.base_url, content_hash)
+        return False
+
+    async def queue_prompt(self, prompt):
+        """워크플로우 dict를 큐에 추가하고 prompt_id 반환"""
+        data = json.dumps({"prompt": prompt, "client_id": self.client_id}).encode('utf-8')
+        return await self.queue_prompt_data(data)
+
+    async def queue_prompt_data(self, data):
+        """이미 인코딩된 /prompt 요청 본문을 큐에 추가하고 prompt_id 반환"""
+        async with self.session.post(
+            f"{self.base_url}/prompt", data=data, headers={"Content-Type": "application/json"}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())['prompt_id']
+
+    async def encode_prompt_request(self, processor, prompt_data):
+        """처리기로 /prompt 요청 본문 생성
+
+        매핑 처리기는 참조 이미지를 이 클라이언트로 업로드한 뒤 템플릿에 오버레이를 끼워 넣고,
+        기존 처리기 클래스는 동기 처리(requests 업로드)를 별도 스레드에서 실행합니다.
+        """
+        if not isinstance(processor, MappedWorkflowProcessor):
+            return await asyncio.to_thread(processor.encode_prompt_request, prompt_data, self.client_id)
+        overlay = {}
+        for op in processor.patch_ops:
+            if op.upload:
+                if op.field in prompt_data:
+                    overlay[(op.node_id, op.input_name)] = await self.upload_image(
+                        prompt_data[op.field], processor.upload_cache
+                    )
+            else:
+                overlay[(op.node_id, op.input_name)] = prompt_data[op.field]
+        return processor.template.render_request(overlay, self.client_id)
+
+    async def get_history(self, prompt_id):
+        """실행 히스토리 가져오기"""
+        async with self.session.get(f"{self.base_url}/history/{prompt_id}") as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def get_queue_remaining(self):
+        """서버 큐에 남은 프롬프트 수"""
+        async with self.session.get(f"{self.base_url}/prompt") as response:
+            response.raise_for_status()
+            return (await response.json())['exec_info']['queue_remaining']
+
+    async def wait_for_completion(self, prompt_id):
+        """실행 완료 이벤트를 기다린 뒤 history 항목 반환
+
+        WebSocket이 연결되지 않았거나 이벤트를 놓쳐도 HISTORY_CHECK_INTERVAL마다 history를 확인합니다.
+        """
+        while True:
+            timeout = HISTORY_CHECK_INTERVAL if self.connected.is_set() else 1
+            await self.wait_for_prompt(prompt_id, timeout=timeout)
+            history = await self.get_history(prompt_id)
+            if prompt_id in history:
+                return history[prompt_id]
+
+    async def download_image(self, filename, subfolder, folder_type, dest_path):
+        """/view 이미지를 청크 단위로 dest_path에 저장 (임시 파일에 받은 뒤 교체)"""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        tmp_path = f"{dest_path}.part"
+        async with self.session.get(f"{self.base_url}/view", params=params) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        os.replace(tmp_path, dest_path)
+        return dest_path
+
+    async def download_outputs(self, history_entry, prompt, parallel=4):
+        """history 항목의 출력 이미지를 <ID>_<순번>.확장자로 저장하고 파일 경로 목록 반환"""
+        jobs = []
+        outputs = history_entry['outputs']
+        for node_id in outputs:
+            for image in outputs[node_id].get('images', []):
+                ext = os.path.splitext(image['filename'])[1] or ".png"
+                jobs.append((image['filename'], image['subfolder'], image['type'], f"{prompt['id']}_{len(jobs)}{ext}"))
+
+        semaphore = asyncio.Semaphore(max(1, parallel))
+
+        async def _download(job):
+            async with semaphore:
+                return await self.download_image(*job)
+
+        return list(await asyncio.gather(*(_download(job) for job in jobs)))
+
+
+async def generate_prompts(clients, create_processor, prompts, in_flight=1, download_parallel=4, profiler=None):
+    """여러 서버에서 프롬프트를 동시에 생성하고 끝나는 순서대로 (prompt, 파일 경로 목록, 에러)를 반환하는 async 제너레이터
+
+    서버마다 in_flight개의 작업 코루틴이 공유 대기열에서 프롬프트를 가져가므로, 빨리 끝나는 서버가
+    더 많은 프롬프트를 맡습니다.
+
+    Args:
+        clients: {서버 주소: 연결된 AsyncComfyUIClient}
+        create_processor: 서버 주소를 받아 워크플로우 처리기를 만드는 함수 (작업 코루틴마다 하나씩 생성)
+        prompts: 처리할 프롬프트 목록
+        in_flight: 서버당 동시에 진행할 프롬프트 수
+        download_parallel: 프롬프트 하나의 출력 이미지를 동시에 받을 개수
+        profiler: RunProfiler (있으면 큐 등록/다운로드 시각 기록)
+    """
+    pending = asyncio.Queue()
+    for prompt in prompts:
+        pending.put_nowait(prompt)
+    results = asyncio.Queue()
+
+    async def _generate(client, processor, prompt):
+        print(f"처리 중: {prompt['name']} (ID: {prompt['id']}) → {client.server_address}")
+        data = await client.encode_prompt_request(processor, prompt)
+        submitted_at = time.time()
+        prompt_id = await client.queue_prompt_data(data)
+        if profiler:
+            profiler.prompt_submitted(prompt_id, client.server_address, prompt['id'], submitted_at)
+        history_entry = await client.wait_for_completion(prompt_id)
+        download_started = time.time()
+        output_paths = await client.download_outputs(history_entry, prompt, download_parallel)
+        if profiler:
+            profiler.prompt_downloaded(prompt_id, output_paths, download_started, time.time(), history_entry)
+        return output_paths
+
+    async def _worker(server):
+        processor = create_processor(server)
+        while not pending.empty():
+            prompt = pending.get_nowait()
+            try:
+                await results.put((prompt, await _generate(clients[server], processor, prompt), None))
+            except Exception as e:
+                await results.put((prompt, None, e))
+
+    workers = [asyncio.create_task(_worker(server)) for server in clients for _ in range(max(1, in_flight))]
+    try:
+        for _ in range(len(prompts)):
+            yield await results.get()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -1,30 +1,110 @@
 import websocket
 import json
 import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class PromptExecutionError(Exception):
+    """ComfyUI가 프롬프트 실행 실패(execution_error/execution_interrupted)를 알림"""
+    pass
 
 
 class ComfyUIClient:
-    def __init__(self, server_address="127.0.0.1:8188"):
+    # 대기 등록 전에 끝난 프롬프트 결과를 보관할 최대 개수
+    MAX_FINISHED = 1000
+
+    def __init__(self, server_address="127.0.0.1:8188", client_id=None):
         self.server_address = server_address
+        # /prompt 요청의 client_id와 같아야 이 소켓으로 실행 이벤트를 받음
+        self.client_id = client_id or str(uuid.uuid4())
         self.ws = None
         self.prompt_id = None
+        self.connected = threading.Event()
+        self._lock = threading.Lock()
+        # prompt_id -> 완료 이벤트 / 결과 (None이면 성공, 아니면 에러 메시지)
+        self._waiters = {}
+        self._finished = OrderedDict()
+        # 수신한 이벤트를 (server_address, type, data, 수신 시각)으로 전달받을 콜백 (프로파일링 등)
+        self._listeners = []
 
     def connect_websocket(self):
-        """WebSocket 연결"""
+        """WebSocket 연결 (끊기면 5초 후 재연결)"""
         self.ws = websocket.WebSocketApp(
-            f"ws://{self.server_address}/ws",
+            f"ws://{self.server_address}/ws?clientId={self.client_id}",
+            on_open=self.on_open,
             on_message=self.on_message,
             on_error=self.on_error,
             on_close=self.on_close
         )
 
-        wst = threading.Thread(target=self.ws.run_forever)
+        wst = threading.Thread(target=self.ws.run_forever, kwargs={"reconnect": 5})
         wst.daemon = True
         wst.start()
 
+    def add_listener(self, callback):
+        """WebSocket 이벤트 리스너 등록. 완료 대기를 깨우기 전에 호출됩니다"""
+        self._listeners.append(callback)
+
+    def wait_until_connected(self, timeout=None):
+        """WebSocket 연결될 때까지 대기. 연결되면 True"""
+        return self.connected.wait(timeout)
+
+    def wait_for_prompt(self, prompt_id, timeout=None):
+        """prompt_id 실행이 끝날 때까지 대기
+
+        완료 이벤트(executing node=None 또는 execution_success)가 오면 즉시 깨어나 True,
+        timeout 안에 이벤트가 없으면 False를 반환합니다 (소켓 재연결 중 놓친 경우 history로 확인).
+        실행 실패 이벤트를 받으면 PromptExecutionError를 발생시킵니다.
+        """
+        with self._lock:
+            if prompt_id in self._finished:
+                return self._raise_if_failed(prompt_id, self._finished.pop(prompt_id))
+            event = self._waiters.setdefault(prompt_id, threading.Event())
+
+        if not event.wait(timeout):
+            with self._lock:
+                if prompt_id not in self._finished:
+                    self._waiters.pop(prompt_id, None)
+                    return False
+
+        with self._lock:
+            self._waiters.pop(prompt_id, None)
+            return self._raise_if_failed(prompt_id, self._finished.pop(prompt_id, None))
+
+    @staticmethod
+    def _raise_if_failed(prompt_id, error):
+        if error is not None:
+            raise PromptExecutionError(f"프롬프트 실행 실패 ({prompt_id}): {error}")
+        return True
+
+    def _finish(self, prompt_id, error=None):
+        """프롬프트 완료 기록 후 대기 중인 작업 깨우기"""
+        if not prompt_id:
+            return
+        with self._lock:
+            if prompt_id in self._finished:
+                return
+            self._finished[prompt_id] = error
+            while len(self._finished) > self.MAX_FINISHED:
+                self._finished.popitem(last=False)
+            event = self._waiters.get(prompt_id)
+        if event:
+            event.set()
+
+    def on_open(self, ws):
+        self.connected.set()
+
     def on_message(self, ws, message):
         """WebSocket 메시지 처리"""
+        # 미리보기 이미지 등 바이너리 메시지는 무시
+        if isinstance(message, bytes):
+            return
+        received_at = time.time()
         data = json.loads(message)
+        for listener in self._listeners:
+            listener(self.server_address, data['type'], data.get('data'), received_at)
         if data['type'] == 'progress':
             value = data['data']['value']
             max_value = data['data']['max']
@@ -32,9 +112,19 @@ class ComfyUIClient:
         elif data['type'] == 'executed':
             node = data['data']['node']
             print(f"노드 실행됨: {node}")
+        elif data['type'] == 'executing':
+            # node가 None이면 해당 프롬프트의 모든 노드 실행 완료
+            if data['data']['node'] is None:
+                self._finish(data['data'].get('prompt_id'))
+        elif data['type'] == 'execution_success':
+            self._finish(data['data'].get('prompt_id'))
+        elif data['type'] in ('execution_error', 'execution_interrupted'):
+            error = data['data'].get('exception_message') or data['type']
+            self._finish(data['data'].get('prompt_id'), error)
 
     def on_error(self, ws, error):
         print(f"에러 발생: {error}")
 
     def on_close(self, ws, close_status_code, close_msg):
-        print("WebSocket 연결 종료")
\ No newline at end of file
+        self.connected.clear()
+        print("WebSocket 연결 종료")
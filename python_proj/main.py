@@ -1,18 +1,37 @@
+import argparse
+import asyncio
 import json
+import os
 import urllib.request
 import urllib.parse
 import uuid
 import websocket
 import time
-from workflow_processor import WorkflowProcessorFactory
+from concurrent.futures import ThreadPoolExecutor
+from async_comfy_client import AsyncComfyUIClient, create_session, generate_prompts
+from comfy_ui_client import ComfyUIClient
+from output_cache import OutputCache, find_outputs, job_key, reuse_outputs
+from progress_journal import ProgressJournal, save_prompts
+from run_profiler import RunProfiler, print_summary
+from upload_cache import UploadCache
+from workflow_processor import WorkflowProcessorFactory, get_session
+from worker_pool import ComfyUIWorkerPool
 
-# ComfyUI 서버 주소
+# ComfyUI 서버 주소 (COMFYUI_SERVERS 환경변수나 --servers로 여러 대 지정 가능)
 server_address = "192.168.50.213:8188"
 
+# WebSocket 완료 이벤트를 놓쳤을 때(재연결 등) history를 확인하는 간격(초)
+HISTORY_CHECK_INTERVAL = 30
 
-def queue_prompt(prompt):
-    """프롬프트를 큐에 추가하고 prompt_id 반환"""
+# 출력 이미지 스트리밍 다운로드 청크 크기(바이트)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def queue_prompt(prompt, server=server_address, client_id=None):
+    """프롬프트를 큐에 추가하고 prompt_id 반환 (client_id의 WebSocket으로 실행 이벤트 수신)"""
     p = {"prompt": prompt}
+    if client_id:
+        p["client_id"] = client_id
     try:
         # 기본 JSON 직렬화 시도
         data = json.dumps(p).encode('utf-8')
@@ -20,43 +39,74 @@ def queue_prompt(prompt):
         print(f"기본 JSON 직렬화 실패: {e}")
         # 대체 방법: 수동으로 JSON 문자열 생성
         prompt_str = json.dumps(prompt)
-        data = f'{{"prompt":{prompt_str}}}'.encode('utf-8')
+        data = f'{{"prompt":{prompt_str},"client_id":{json.dumps(client_id)}}}'.encode('utf-8')
     
-    req = urllib.request.Request(f"http://{server_address}/prompt", data=data)
+    return queue_prompt_data(data, server)
+
+
+def queue_prompt_data(data, server=server_address):
+    """이미 인코딩된 /prompt 요청 본문을 큐에 추가하고 응답 반환"""
+    req = urllib.request.Request(f"http://{server}/prompt", data=data)
     return json.loads(urllib.request.urlopen(req).read())
 
 
-def get_image(filename, subfolder, folder_type):
+def get_image(filename, subfolder, folder_type, server=server_address):
     """생성된 이미지 다운로드"""
     data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
     url_values = urllib.parse.urlencode(data)
-    with urllib.request.urlopen(f"http://{server_address}/view?{url_values}") as response:
+    with urllib.request.urlopen(f"http://{server}/view?{url_values}") as response:
         return response.read()
 
 
-def get_history(prompt_id):
+def download_image_to_file(filename, subfolder, folder_type, dest_path, server=server_address):
+    """생성된 이미지를 청크 단위로 dest_path에 바로 저장 (메모리에 전체를 올리지 않음)
+
+    임시 파일에 받은 뒤 교체하므로 중간에 실패해도 잘린 파일이 남지 않습니다.
+    """
+    params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+    tmp_path = f"{dest_path}.part"
+    with get_session().get(f"http://{server}/view", params=params, stream=True) as response:
+        response.raise_for_status()
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def get_history(prompt_id, server=server_address):
     """실행 히스토리 가져오기"""
-    with urllib.request.urlopen(f"http://{server_address}/history/{prompt_id}") as response:
+    with urllib.request.urlopen(f"http://{server}/history/{prompt_id}") as response:
         return json.loads(response.read())
 
 
-def generate_image(processor, prompt_data):
-    """이미지 생성 메인 함수"""
-    # 프롬프트 수정
-    processor.modify_prompt(prompt_data)
-    
-    # 수정된 워크플로우로 이미지 생성
-    prompt_id = queue_prompt(processor.get_workflow())['prompt_id']
+def submit_prompt(processor, prompt_data, server=server_address, client=None):
+    """프롬프트를 워크플로우에 반영해 큐에 넣고 prompt_id 반환"""
+    # 프롬프트를 반영한 요청 본문 생성 (매핑 처리기는 템플릿에 오버레이만 끼워 넣음)
+    client_id = client.client_id if client else None
+    data = processor.encode_prompt_request(prompt_data, client_id)
+    return queue_prompt_data(data, server)['prompt_id']
+
 
-    # 완료 대기
+def wait_for_completion(prompt_id, server=server_address, client=None):
+    """프롬프트 실행 완료까지 대기 후 history 항목 반환
+
+    client(server에 연결된 ComfyUIClient)가 있으면 WebSocket 완료 이벤트로 대기하고,
+    없으면 1초 간격으로 history를 폴링합니다.
+    """
     while True:
-        history = get_history(prompt_id)
+        if client:
+            client.wait_for_prompt(prompt_id, timeout=HISTORY_CHECK_INTERVAL)
+        else:
+            time.sleep(1)
+        history = get_history(prompt_id, server)
         if prompt_id in history:
-            break
-        time.sleep(1)
+            return history[prompt_id]
+
 
-    # 이미지 정보 추출
-    outputs = history[prompt_id]['outputs']
+def download_images(history_entry, server=server_address):
+    """history 항목의 출력 이미지 다운로드"""
+    outputs = history_entry['outputs']
     images = []
 
     for node_id in outputs:
@@ -66,41 +116,257 @@ def generate_image(processor, prompt_data):
                 image_data = get_image(
                     image['filename'],
                     image['subfolder'],
-                    image['type']
+                    image['type'],
+                    server
                 )
                 images.append(image_data)
 
     return images
 
 
+def generate_image(processor, prompt_data, server=server_address, client=None):
+    """이미지 생성 메인 함수 (processor는 server에 이미지를 업로드하도록 만들어져 있어야 함)"""
+    prompt_id = submit_prompt(processor, prompt_data, server, client)
+    history_entry = wait_for_completion(prompt_id, server, client)
+    return download_images(history_entry, server)
+
+
+def download_outputs(history_entry, prompt, server=server_address, parallel=1):
+    """history 항목의 출력 이미지를 ID를 포함한 파일명으로 스트리밍 저장하고 파일 경로 목록 반환
+
+    parallel > 1이면 여러 이미지(애니메이션 프레임 등)를 동시에 받습니다.
+    """
+    jobs = []
+    outputs = history_entry['outputs']
+    for node_id in outputs:
+        for image in outputs[node_id].get('images', []):
+            ext = os.path.splitext(image['filename'])[1] or ".png"
+            dest_path = f"{prompt['id']}_{len(jobs)}{ext}"
+            jobs.append((image['filename'], image['subfolder'], image['type'], dest_path, server))
+
+    if parallel <= 1 or len(jobs) <= 1:
+        return [download_image_to_file(*job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(parallel, len(jobs))) as executor:
+        return list(executor.map(lambda job: download_image_to_file(*job), jobs))
+
+
+def submit_and_wait(server, processor, prompt, client=None, profiler=None):
+    """프롬프트 큐 등록 후 실행 완료까지 대기하고 (prompt_id, history 항목) 반환"""
+    submitted_at = time.time()
+    prompt_id = submit_prompt(processor, prompt, server, client)
+    if profiler:
+        profiler.prompt_submitted(prompt_id, server, prompt['id'], submitted_at)
+    return prompt_id, wait_for_completion(prompt_id, server, client)
+
+
+def save_outputs(prompt_id, history_entry, prompt, server=server_address, parallel=1, profiler=None):
+    """출력 이미지를 파일로 저장하고 파일 경로 목록 반환 (profiler가 있으면 다운로드 시간까지 기록)"""
+    download_started = time.time()
+    output_paths = download_outputs(history_entry, prompt, server, parallel)
+    if profiler:
+        profiler.prompt_downloaded(prompt_id, output_paths, download_started, time.time(), history_entry)
+    return output_paths
+
+
+def generate_and_save(server, processor, prompt, client=None, parallel=1, profiler=None):
+    """워커 풀 작업: 이미지 생성 후 파일로 저장하고 파일 경로 목록 반환"""
+    print(f"처리 중: {prompt['name']} (ID: {prompt['id']}) → {server}")
+    prompt_id, history_entry = submit_and_wait(server, processor, prompt, client, profiler)
+    return save_outputs(prompt_id, history_entry, prompt, server, parallel, profiler)
+
+
+async def generate_async(servers, workflow_file, prompts, in_flight=1, download_parallel=4,
+                         upload_cache=None, profiler=None):
+    """asyncio 모드: 서버마다 AsyncComfyUIClient를 연결하고 끝나는 순서대로 (prompt, 파일 경로 목록, 에러) 반환"""
+    async with create_session() as session:
+        clients = {}
+        for address in servers:
+            client = AsyncComfyUIClient(address, session)
+            await client.connect()
+            clients[address] = client
+            if profiler:
+                client.add_listener(profiler.on_event)
+        for address, client in clients.items():
+            if not await client.wait_until_connected(timeout=5):
+                print(f"WebSocket 연결 실패 ({address}): history 폴링으로 대기")
+
+        try:
+            results = generate_prompts(
+                clients,
+                lambda address: WorkflowProcessorFactory.create_processor(workflow_file, f"http://{address}", upload_cache),
+                prompts,
+                in_flight=in_flight,
+                download_parallel=download_parallel,
+                profiler=profiler,
+            )
+            async for result in results:
+                yield result
+        finally:
+            for client in clients.values():
+                await client.close()
+
+
+def workflow_node_types(workflow_file):
+    """워크플로우의 {노드 ID: class_type} (프로파일 보고서용)"""
+    with open(workflow_file, 'r', encoding='utf-8') as f:
+        workflow_data = json.load(f)
+    return {node_id: node.get('class_type') for node_id, node in workflow_data.items()}
+
+
 # 사용 예시
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="prompts.json의 미처리 항목을 ComfyUI 서버들에서 이미지로 생성")
+    parser.add_argument("--servers", nargs="+",
+                        default=[a.strip() for a in os.environ.get("COMFYUI_SERVERS", server_address).split(",") if a.strip()],
+                        help="ComfyUI 서버 주소 목록 host:port (기본값: COMFYUI_SERVERS 환경변수 또는 server_address)")
+    parser.add_argument("--workflow", default="test_03.json", help="워크플로우 파일 (기본값: test_03.json)")
+    parser.add_argument("--in-flight", type=int, default=1, help="서버당 동시 처리(파이프라인 모드에서는 큐에 유지할) 프롬프트 수 (기본값: 1)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="파이프라인 모드: 실행이 끝나면 바로 다음 프롬프트를 큐에 넣고 다운로드/저장은 별도 스레드에서 수행")
+    parser.add_argument("--download-workers", type=int, default=4, help="파이프라인 모드 다운로드 스레드 수 (기본값: 4)")
+    parser.add_argument("--download-parallel", type=int, default=4, help="프롬프트 하나의 출력 이미지를 동시에 받을 개수 (기본값: 4)")
+    parser.add_argument("--prompts", default="prompts.json", help="프롬프트 파일 (기본값: prompts.json)")
+    parser.add_argument("--upload-cache", default=".upload_cache.json",
+                        help="참조 이미지 업로드 캐시 파일 (기본값: .upload_cache.json, 빈 문자열이면 저장하지 않음)")
+    parser.add_argument("--journal", help="진행 저널 파일 (기본값: <prompts>.journal.jsonl)")
+    parser.add_argument("--output-cache", default=".output_cache.json",
+                        help="생성 결과 캐시 파일 (기본값: .output_cache.json, 빈 문자열이면 사용하지 않음). "
+                             "입력이 같은 작업은 건너뛰고 입력이 바뀐 프롬프트만 다시 생성")
+    parser.add_argument("--profile",
+                        help="프로파일 보고서 JSONL 경로. 프롬프트별 큐 대기/실행/다운로드·노드별 시간을 기록하고 "
+                             "끝나면 <경로>.summary.json에 처리량/느린 노드/GPU 유휴 구간 요약 저장")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="asyncio 모드: aiohttp 세션 하나로 업로드/큐/히스토리/다운로드/WebSocket을 처리 "
+                             "(서버당 --in-flight개 프롬프트를 스레드 없이 동시 진행)")
+    args = parser.parse_args()
+
     # prompts.json 파일 로드
-    with open('prompts.json', 'r', encoding='utf-8') as f:
+    with open(args.prompts, 'r', encoding='utf-8') as f:
         prompts = json.load(f)
 
-    # 워크플로우 처리기 생성
-    workflow_file = "test_03.json"
-    processor = WorkflowProcessorFactory.create_processor(workflow_file)
-
-    # is_processed가 false인 항목만 처리
-    for prompt in prompts:
-        if not prompt['is_processed']:
-            print(f"처리 중: {prompt['name']} (ID: {prompt['id']})")
-            
-            # 이미지 생성
-            generated_images = generate_image(processor, prompt)
-
-            # 이미지 저장 (ID를 파일명에 포함)
-            for idx, image_data in enumerate(generated_images):
-                output_filename = f"{prompt['id']}_{idx}.png"
-                with open(output_filename, "wb") as f:
-                    f.write(image_data)
-                print(f"이미지 저장됨: {output_filename}")
-
-            # 처리 완료 표시
-            prompt['is_processed'] = True
-
-    # 처리 상태 저장
-    with open('prompts.json', 'w', encoding='utf-8') as f:
-        json.dump(prompts, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+    # 이전 실행이 중간에 끝났다면 저널에 기록된 완료 항목을 복원
+    journal = ProgressJournal(args.journal or f"{args.prompts}.journal.jsonl")
+    restored = journal.apply(prompts)
+    if restored:
+        print(f"진행 저널에서 {restored}건 복원: {journal.path}")
+
+    # 프로파일링: WebSocket 이벤트로 프롬프트/노드별 시각 기록
+    profiler = RunProfiler(args.profile, workflow_node_types(args.workflow)) if args.profile else None
+
+    # 같은 참조 이미지는 서버마다 한 번만 업로드 (모든 처리기가 캐시 공유)
+    upload_cache = UploadCache(args.upload_cache or None)
+
+    # 생성 결과 캐시: (워크플로우 템플릿, 패치 입력, 시드)가 같은 작업은 저장된 파일을 재사용하고,
+    # 이전과 입력이 달라졌거나 출력 파일이 지워진 프롬프트는 is_processed여도 다시 생성
+    output_cache = OutputCache(args.output_cache) if args.output_cache else None
+    job_keys = {}
+    if output_cache:
+        key_processor = WorkflowProcessorFactory.create_processor(
+            args.workflow, f"http://{args.servers[0]}", upload_cache
+        )
+        reused, changed, adopted = 0, 0, 0
+        for prompt in prompts:
+            try:
+                key = job_key(key_processor, prompt, upload_cache.content_hash)
+            except (KeyError, OSError):
+                # 입력이 빠졌거나 이미지가 없는 항목은 생성 단계에서 에러로 보고
+                continue
+            job_keys[prompt['id']] = key
+            cached_outputs = output_cache.get(key, prompt['id'])
+            if cached_outputs is not None:
+                output_paths = reuse_outputs(cached_outputs, prompt['id'])
+                if output_cache.is_changed(prompt['id'], key) or output_paths != cached_outputs:
+                    output_cache.set(key, prompt['id'], output_paths)
+                reused += not prompt['is_processed']
+                prompt['is_processed'] = True
+            elif output_cache.has_record(prompt['id']):
+                # 같은 키의 파일이 없으므로 입력이 바뀌었거나 출력 파일이 지워진 경우
+                changed += prompt['is_processed']
+                prompt['is_processed'] = False
+            elif prompt['is_processed']:
+                # 캐시 도입 전에 생성한 항목: 디스크의 <ID>_<순번> 출력을 현재 입력의 결과로 기록해
+                # 이후 입력을 바꾸면 다시 생성되도록 함
+                output_paths = find_outputs(prompt['id'])
+                if output_paths:
+                    output_cache.set(key, prompt['id'], output_paths)
+                    adopted += 1
+        if adopted:
+            print(f"출력 캐시: 기존 출력 {adopted}건을 캐시에 기록")
+        if reused or changed:
+            print(f"출력 캐시: {reused}건 재사용, 입력이 바뀌었거나 파일이 없는 {changed}건 다시 생성")
+
+    # is_processed가 false인 항목만 처리 (완료되는 순서대로 결과 수신)
+    pending = [prompt for prompt in prompts if not prompt['is_processed']]
+
+    def record_result(prompt, output_filenames, error):
+        if error is not None:
+            print(f"처리 실패: {prompt['name']} (ID: {prompt['id']}): {error}")
+            return
+        for output_filename in output_filenames:
+            print(f"이미지 저장됨: {output_filename}")
+
+        # 처리 완료 표시 (저널에 바로 기록하여 중단되어도 유지)
+        journal.record(prompt['id'], output_filenames)
+        prompt['is_processed'] = True
+        if output_cache and prompt['id'] in job_keys:
+            output_cache.set(job_keys[prompt['id']], prompt['id'], output_filenames)
+
+    if args.use_async:
+        # asyncio 모드: 스레드 없이 이벤트 루프 하나에서 aiohttp 세션(연결 풀)을 공유해 모든 서버를 처리
+        async def run_async():
+            results = generate_async(args.servers, args.workflow, pending, args.in_flight,
+                                     args.download_parallel, upload_cache, profiler)
+            async for prompt, output_filenames, error in results:
+                record_result(prompt, output_filenames, error)
+
+        asyncio.run(run_async())
+    else:
+        # 서버별 WebSocket 연결 (완료 이벤트 수신). 연결 실패 시 해당 서버는 history 폴링
+        clients = {}
+        for address in args.servers:
+            client = ComfyUIClient(address)
+            client.connect_websocket()
+            if client.wait_until_connected(timeout=5):
+                clients[address] = client
+                if profiler:
+                    client.add_listener(profiler.on_event)
+            else:
+                print(f"WebSocket 연결 실패 ({address}): history 폴링으로 대기")
+
+        # 서버마다 동시 작업 수만큼 워크플로우 처리기 생성 (업로드 대상 서버가 다르고 workflow_data를 공유하면 안 됨)
+        pool = ComfyUIWorkerPool(
+            args.servers,
+            lambda comfyui_url: WorkflowProcessorFactory.create_processor(args.workflow, comfyui_url, upload_cache),
+            max_in_flight=args.in_flight,
+        )
+
+        def handle(server, processor, prompt):
+            return generate_and_save(server, processor, prompt, clients.get(server), args.download_parallel, profiler)
+
+        # 파이프라인 모드: 서버 자리는 실행 완료까지만 차지하고, 다운로드/저장은 다음 생성과 겹쳐 실행
+        def queue_and_wait(server, processor, prompt):
+            print(f"큐 등록: {prompt['name']} (ID: {prompt['id']}) → {server}")
+            return submit_and_wait(server, processor, prompt, clients.get(server), profiler)
+
+        def download_and_save(server, prompt, completed):
+            prompt_id, history_entry = completed
+            return save_outputs(prompt_id, history_entry, prompt, server, args.download_parallel, profiler)
+
+        if args.pipeline:
+            results = pool.run(pending, queue_and_wait, finish=download_and_save, finish_workers=args.download_workers)
+        else:
+            results = pool.run(pending, handle)
+
+        for prompt, output_filenames, error in results:
+            record_result(prompt, output_filenames, error)
+
+        print(f"서버별 처리 결과: {pool.summary()}")
+
+    if profiler:
+        profiler.close()
+        print_summary(profiler.write_summary(f"{args.profile}.summary.json"))
+        print(f"프로파일 보고서: {args.profile}")
+
+    # 처리 상태 저장 후 저널 정리 (prompts.json에 반영되었으므로 더 이상 필요 없음)
+    save_prompts(args.prompts, prompts)
+    journal.clear()
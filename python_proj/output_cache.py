@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+from upload_cache import file_sha256
+
+# 작업 입력으로 보지 않는 프롬프트 항목 (기존 처리기 클래스용)
+NON_INPUT_FIELDS = ("id", "name", "is_processed")
+
+
+def job_key(processor, prompt_data, content_hash=file_sha256):
+    """생성 작업 키: (워크플로우 템플릿, 패치 입력, 시드)의 SHA-256
+
+    매핑 처리기는 템플릿에 이 프롬프트의 오버레이를 끼운 최종 그래프를 해시하므로
+    템플릿에 들어 있는 시드·샘플러 설정과 패치되는 입력이 모두 키에 포함됩니다.
+    업로드 항목은 서버 파일명 대신 이미지 내용 해시를 넣어, 업로드하지 않고도 키를 계산하고
+    같은 경로의 이미지 내용이 바뀌면 다른 작업으로 봅니다.
+
+    Args:
+        processor: 워크플로우 처리기
+        prompt_data: prompts.json 항목
+        content_hash: 이미지 경로 → 내용 해시 함수 (UploadCache.content_hash를 넘기면 해시 재사용)
+    """
+    if hasattr(processor, "template"):
+        overlay = {}
+        for op in processor.patch_ops:
+            if op.upload:
+                if op.field in prompt_data:
+                    overlay[(op.node_id, op.input_name)] = f"sha256:{content_hash(prompt_data[op.field])}"
+            else:
+                overlay[(op.node_id, op.input_name)] = prompt_data[op.field]
+        encoded = processor.template.render(overlay)
+    else:
+        # 기존 처리기 클래스: 원본 워크플로우 + 프롬프트 입력 전체
+        inputs = {k: v for k, v in prompt_data.items() if k not in NON_INPUT_FIELDS}
+        if "image" in inputs:
+            inputs["image"] = f"sha256:{content_hash(inputs['image'])}"
+        encoded = json.dumps({"workflow": processor.get_workflow(), "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class OutputCache:
+    """생성 결과 캐시: 프롬프트 ID → (작업 키, 저장된 출력 파일)
+
+    - 같은 작업 키의 출력 파일이 모두 남아 있으면 다시 생성하지 않습니다 (다른 ID의 결과도 재사용)
+    - 프롬프트 ID별 마지막 작업 키를 기록하므로 입력이 바뀌었거나 출력 파일이 지워진 프롬프트는
+      is_processed여도 다시 생성합니다
+    - path가 주어지면 JSON 파일로 저장하여 다음 실행에서도 재사용합니다
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # 프롬프트 ID -> {"key": 작업 키, "outputs": [파일 경로]}
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        # 작업 키 -> 그 키로 생성한 프롬프트 ID 목록
+        self._ids_by_key = {}
+        for prompt_id, entry in self._entries.items():
+            self._ids_by_key.setdefault(entry["key"], []).append(prompt_id)
+
+    def get(self, key, prompt_id=None):
+        """키의 출력 파일 목록 (기록이 없거나 파일이 하나라도 없으면 None). prompt_id 자신의 결과를 먼저 확인"""
+        with self._lock:
+            ids = sorted(self._ids_by_key.get(key, []), key=lambda cached_id: cached_id != prompt_id)
+            candidates = [self._entries[cached_id]["outputs"] for cached_id in ids]
+        for outputs in candidates:
+            if all(os.path.exists(path) for path in outputs):
+                return list(outputs)
+        return None
+
+    def has_record(self, prompt_id):
+        """이 프롬프트 ID를 생성한 기록이 있으면 True"""
+        with self._lock:
+            return prompt_id in self._entries
+
+    def is_changed(self, prompt_id, key):
+        """이 프롬프트 ID를 다른 입력으로 생성한 기록이 있으면 True"""
+        with self._lock:
+            entry = self._entries.get(prompt_id)
+        return entry is not None and entry["key"] != key
+
+    def set(self, key, prompt_id, output_paths):
+        """생성 결과 기록 (path가 있으면 파일에도 저장)"""
+        with self._lock:
+            previous = self._entries.get(prompt_id)
+            if previous is not None:
+                self._ids_by_key[previous["key"]].remove(prompt_id)
+            self._entries[prompt_id] = {"key": key, "outputs": list(output_paths)}
+            self._ids_by_key.setdefault(key, []).append(prompt_id)
+            if self.path:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def reuse_outputs(cached_paths, prompt_id):
+    """다른 ID로 생성된 같은 작업의 출력을 <ID>_<순번>.확장자로 복사하고 경로 목록 반환"""
+    output_paths = []
+    for idx, cached_path in enumerate(cached_paths):
+        ext = os.path.splitext(cached_path)[1] or ".png"
+        dest_path = f"{prompt_id}_{idx}{ext}"
+        if os.path.abspath(dest_path) != os.path.abspath(cached_path):
+            shutil.copyfile(cached_path, dest_path)
+        output_paths.append(dest_path)
+    return output_paths
+
+
+def find_outputs(prompt_id, directory="."):
+    """디스크에 있는 이 프롬프트의 출력 파일(<ID>_<순번>.확장자)을 순번 순으로 반환
+
+    캐시를 쓰기 전에 생성해 둔 출력을 기록할 때 사용합니다. 0번부터 이어지는 파일만 포함합니다.
+    """
+    pattern = re.compile(rf"^{re.escape(str(prompt_id))}_(\d+)\.[^.]+$")
+    by_index = {}
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            by_index.setdefault(int(match.group(1)), name)
+    output_paths = []
+    while len(output_paths) in by_index:
+        name = by_index[len(output_paths)]
+        output_paths.append(name if directory == "." else os.path.join(directory, name))
+    return output_paths
@@ -0,0 +1,85 @@
+import json
+import os
+from datetime import datetime
+
+
+class ProgressJournal:
+    """처리 완료된 프롬프트를 기록하는 추가 전용(JSONL) 진행 저널
+
+    한 줄 = 완료된 프롬프트 하나 ({"id", "outputs", "completed_at"}).
+    기록마다 fsync하므로 도중에 프로세스가 죽어도 이미 끝난 프롬프트는 다시 생성하지 않습니다.
+    마지막 줄이 쓰다 만 상태로 남아도 재생 시 건너뜁니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def replay(self):
+        """저널을 읽어 {프롬프트 ID: 출력 파일명 목록} 반환 (저널이 없으면 빈 dict)"""
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    completed[entry['id']] = entry.get('outputs', [])
+                except (ValueError, KeyError, TypeError):
+                    # 비정상 종료로 잘린 줄
+                    continue
+        return completed
+
+    def apply(self, prompts):
+        """저널에 기록된 프롬프트를 is_processed로 표시하고 표시한 개수 반환"""
+        completed = self.replay()
+        restored = 0
+        for prompt in prompts:
+            if not prompt['is_processed'] and prompt['id'] in completed:
+                prompt['is_processed'] = True
+                restored += 1
+        return restored
+
+    def record(self, prompt_id, output_filenames):
+        """완료된 프롬프트 한 건을 추가하고 디스크에 반영될 때까지 대기"""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # 이전 실행이 줄 중간에 끊겼다면 새 기록이 그 줄에 이어 붙지 않도록 줄바꿈
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                self._file.write("\n")
+
+        entry = {
+            "id": prompt_id,
+            "outputs": list(output_filenames),
+            "completed_at": datetime.now().isoformat(),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def clear(self):
+        """prompts.json에 진행 상태를 반영한 뒤 저널 삭제"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def save_prompts(path, prompts):
+    """prompts.json을 임시 파일에 쓴 뒤 교체 (저장 도중 죽어도 기존 파일 유지)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(prompts, f, ensure_ascii=False, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,204 @@
+import json
+import statistics
+import threading
+import time
+
+
+class RunProfiler:
+    """ComfyUI 실행 프로파일러
+
+    WebSocket 이벤트(execution_start, executing, execution_cached, execution_success)와
+    큐 등록/다운로드 시각을 프롬프트별로 모아 큐 대기·실행·다운로드 시간과 노드별 실행 시간을 계산합니다.
+    프롬프트가 끝날 때마다 JSONL에 한 줄씩 기록하고, summary()로 처리량(이미지/분),
+    느린 노드, 서버별 GPU 유휴 구간을 요약합니다.
+    """
+
+    def __init__(self, path, node_types=None):
+        """
+        Args:
+            path: 프롬프트별 기록을 남길 JSONL 파일 경로
+            node_types: {노드 ID: class_type} (보고서에 노드 종류 표시용)
+        """
+        self.path = path
+        self.node_types = node_types or {}
+        self.started_at = time.time()
+        self._prompts = {}
+        self._records = []
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _prompt(self, prompt_id):
+        return self._prompts.setdefault(prompt_id, {"prompt_id": prompt_id, "nodes": [], "cached_nodes": []})
+
+    def prompt_submitted(self, prompt_id, server, prompt_key, submitted_at=None):
+        """큐 등록 시각 기록 (prompt_key: prompts.json 항목 ID)"""
+        with self._lock:
+            entry = self._prompt(prompt_id)
+            entry.update(server=server, id=prompt_key, submitted_at=submitted_at or time.time())
+
+    def on_event(self, server, event_type, data, timestamp):
+        """ComfyUIClient 리스너: WebSocket 이벤트를 프롬프트별로 기록"""
+        prompt_id = data.get('prompt_id') if isinstance(data, dict) else None
+        if not prompt_id:
+            return
+        with self._lock:
+            entry = self._prompt(prompt_id)
+            entry.setdefault("server", server)
+            if event_type == 'execution_start':
+                entry["started_at"] = timestamp
+            elif event_type == 'execution_cached':
+                entry["cached_nodes"] = list(data.get('nodes', []))
+            elif event_type == 'executing':
+                self._close_running_node(entry, timestamp)
+                if data.get('node') is None:
+                    entry.setdefault("finished_at", timestamp)
+                else:
+                    entry.setdefault("started_at", timestamp)
+                    entry["running"] = (str(data['node']), timestamp)
+            elif event_type == 'execution_success':
+                self._close_running_node(entry, timestamp)
+                entry.setdefault("finished_at", timestamp)
+
+    @staticmethod
+    def _close_running_node(entry, timestamp):
+        running = entry.pop("running", None)
+        if running:
+            node_id, node_started = running
+            entry["nodes"].append({"node": node_id, "seconds": timestamp - node_started})
+
+    @staticmethod
+    def _history_timestamps(history_entry):
+        """history 항목 status.messages의 실행 시작/종료 시각 (WebSocket 없이 폴링한 경우 사용)"""
+        timestamps = {}
+        messages = (history_entry or {}).get('status', {}).get('messages', [])
+        for event_type, data in messages:
+            if 'timestamp' in data:
+                timestamps[event_type] = data['timestamp'] / 1000
+        return timestamps.get('execution_start'), timestamps.get('execution_success')
+
+    def prompt_downloaded(self, prompt_id, output_paths, download_started, download_finished, history_entry=None):
+        """다운로드까지 끝난 프롬프트를 JSONL에 기록"""
+        with self._lock:
+            entry = self._prompts.pop(prompt_id, None) or {"nodes": [], "cached_nodes": []}
+
+        if not entry.get("started_at") or not entry.get("finished_at"):
+            started, finished = self._history_timestamps(history_entry)
+            entry.setdefault("started_at", started)
+            entry.setdefault("finished_at", finished)
+        submitted = entry.get("submitted_at")
+        started = entry.get("started_at")
+        finished = entry.get("finished_at")
+        record = {
+            "prompt_id": prompt_id,
+            "id": entry.get("id"),
+            "server": entry.get("server"),
+            "submitted_at": submitted,
+            "started_at": started,
+            "finished_at": finished,
+            "downloaded_at": download_finished,
+            "queue_wait": started - submitted if started and submitted else None,
+            "execution": finished - started if finished and started else None,
+            "download": download_finished - download_started,
+            "images": len(output_paths),
+            "nodes": [
+                dict(node, class_type=self.node_types.get(node["node"])) for node in entry["nodes"]
+            ],
+            "cached_nodes": entry["cached_nodes"],
+        }
+        with self._lock:
+            self._records.append(record)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        return record
+
+    def summary(self, top_nodes=10):
+        """실행 요약: 처리량, 단계별 시간, 느린 노드, 서버별 GPU 유휴 구간"""
+        with self._lock:
+            records = list(self._records)
+        elapsed = time.time() - self.started_at
+        images = sum(r["images"] for r in records)
+
+        def _stats(values):
+            values = [v for v in values if v is not None]
+            if not values:
+                return None
+            return {"mean": statistics.mean(values), "p50": statistics.median(values), "max": max(values)}
+
+        node_times = {}
+        for r in records:
+            for node in r["nodes"]:
+                node_times.setdefault(node["node"], []).append(node["seconds"])
+        slowest = sorted(
+            (
+                {
+                    "node": node_id,
+                    "class_type": self.node_types.get(node_id),
+                    "total": sum(times),
+                    "mean": statistics.mean(times),
+                    "count": len(times),
+                }
+                for node_id, times in node_times.items()
+            ),
+            key=lambda n: n["total"],
+            reverse=True,
+        )[:top_nodes]
+
+        # 서버별로 실행 구간을 시간순 정렬해 앞 실행 종료 ~ 다음 실행 시작 사이를 GPU 유휴로 계산
+        servers = {}
+        for r in records:
+            if r["started_at"] and r["finished_at"]:
+                servers.setdefault(r["server"], []).append((r["started_at"], r["finished_at"]))
+        gpu = {}
+        for server, spans in servers.items():
+            spans.sort()
+            gaps = [max(0.0, nxt[0] - prev[1]) for prev, nxt in zip(spans, spans[1:])]
+            busy = sum(end - start for start, end in spans)
+            window = spans[-1][1] - spans[0][0]
+            gpu[server] = {
+                "prompts": len(spans),
+                "busy_seconds": busy,
+                "idle_seconds": sum(gaps),
+                "max_idle_gap": max(gaps) if gaps else 0.0,
+                "utilization": busy / window if window > 0 else 1.0,
+            }
+
+        return {
+            "prompts": len(records),
+            "images": images,
+            "elapsed_seconds": elapsed,
+            "images_per_minute": images / elapsed * 60 if elapsed > 0 else 0.0,
+            "queue_wait": _stats(r["queue_wait"] for r in records),
+            "execution": _stats(r["execution"] for r in records),
+            "download": _stats(r["download"] for r in records),
+            "slowest_nodes": slowest,
+            "gpu": gpu,
+        }
+
+    def write_summary(self, path):
+        """요약을 JSON 파일로 저장하고 반환"""
+        summary = self.summary()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def print_summary(summary):
+    """요약을 사람이 읽기 쉬운 형태로 출력"""
+    print(f"📊 {summary['prompts']}개 프롬프트, 이미지 {summary['images']}장, "
+          f"{summary['elapsed_seconds']:.1f}초 → {summary['images_per_minute']:.1f}장/분")
+    for stage, label in (("queue_wait", "큐 대기"), ("execution", "실행"), ("download", "다운로드")):
+        stats = summary[stage]
+        if stats:
+            print(f"  {label:<6} mean={stats['mean']:.2f}s  p50={stats['p50']:.2f}s  max={stats['max']:.2f}s")
+    if summary["slowest_nodes"]:
+        print("  느린 노드 (누적 시간 순):")
+        for node in summary["slowest_nodes"]:
+            print(f"    node {node['node']:<6} {node['class_type'] or '':<28} "
+                  f"total={node['total']:.2f}s  mean={node['mean']:.2f}s  x{node['count']}")
+    for server, gpu in summary["gpu"].items():
+        print(f"  {server}: 가동률 {gpu['utilization'] * 100:.1f}%  유휴 {gpu['idle_seconds']:.2f}s  "
+              f"최대 유휴 구간 {gpu['max_idle_gap']:.2f}s")
@@ -0,0 +1,186 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from unittest.mock import patch
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_comfy_client import AsyncComfyUIClient, create_session
+from comfy_ui_client import PromptExecutionError
+from upload_cache import UploadCache
+
+
+class TestAsyncComfyUIClient(unittest.IsolatedAsyncioTestCase):
+    """asyncio ComfyUI 클라이언트의 완료 이벤트 처리 테스트 (서버 연결 없음)"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.client = AsyncComfyUIClient("127.0.0.1:8188")
+
+    async def test_wait_wakes_on_completion_event(self):
+        """대기 중에 executing node=None 이벤트가 오면 바로 깨어나는지 테스트"""
+        waiter = asyncio.create_task(self.client.wait_for_prompt("p1", timeout=5))
+        await asyncio.sleep(0)
+        self.client._handle_message({"type": "executing", "data": {"node": None, "prompt_id": "p1"}})
+
+        self.assertTrue(await waiter)
+        self.assertEqual(self.client._waiters, {})
+
+    async def test_completion_before_wait(self):
+        """대기 등록 전에 끝난 프롬프트도 완료로 처리하는지 테스트"""
+        self.client._handle_message({"type": "execution_success", "data": {"prompt_id": "p1"}})
+
+        self.assertTrue(await self.client.wait_for_prompt("p1", timeout=0.1))
+
+    async def test_wait_timeout(self):
+        """이벤트가 없으면 timeout 후 False를 반환하는지 테스트"""
+        self.assertFalse(await self.client.wait_for_prompt("p1", timeout=0.01))
+
+    async def test_execution_error(self):
+        """실행 실패 이벤트를 받으면 PromptExecutionError가 발생하는지 테스트"""
+        self.client._handle_message({
+            "type": "execution_error",
+            "data": {"prompt_id": "p1", "exception_message": "CUDA out of memory"},
+        })
+
+        with self.assertRaises(PromptExecutionError) as context:
+            await self.client.wait_for_prompt("p1", timeout=0.1)
+
+        self.assertIn("CUDA out of memory", str(context.exception))
+
+    async def test_listener_receives_events(self):
+        """등록한 리스너가 모든 이벤트를 받는지 테스트"""
+        events = []
+        self.client.add_listener(lambda server, event_type, data, timestamp: events.append((server, event_type)))
+
+        self.client._handle_message({"type": "executing", "data": {"node": "3", "prompt_id": "p1"}})
+        self.client._handle_message({"type": "status", "data": {"status": {}}})
+
+        self.assertEqual(events, [("127.0.0.1:8188", "executing"), ("127.0.0.1:8188", "status")])
+
+
+class TestAsyncComfyUIClientWebSocket(unittest.IsolatedAsyncioTestCase):
+    """로컬 WebSocket 서버로 수신 작업이 메시지 처리 에러에도 계속 동작하는지 테스트"""
+
+    async def asyncSetUp(self):
+        """순서대로 메시지를 보내는 /ws 서버 시작"""
+        self.messages = [
+            {"type": "executing", "data": {"prompt_id": "p1"}},  # node 누락 (잘못된 메시지)
+            {"type": "executing", "data": {"node": "3", "prompt_id": "p1"}},
+            {"type": "executing", "data": {"node": None, "prompt_id": "p1"}},
+        ]
+        self.close_after_send = False
+
+        async def ws_handler(request):
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            for message in self.messages:
+                await ws.send_json(message)
+            if self.close_after_send:
+                await ws.close()
+                return ws
+            async for _ in ws:
+                pass
+            return ws
+
+        app = web.Application()
+        app.router.add_get("/ws", ws_handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.client = AsyncComfyUIClient(f"{self.server.host}:{self.server.port}")
+
+    async def asyncTearDown(self):
+        """클라이언트와 서버 종료"""
+        await self.client.close()
+        await self.server.close()
+
+    async def test_receive_survives_listener_and_message_errors(self):
+        """리스너 예외와 잘못된 메시지가 있어도 완료 이벤트를 받는지 테스트"""
+        def failing_listener(server, event_type, data, timestamp):
+            raise RuntimeError("listener failed")
+
+        self.client.add_listener(failing_listener)
+        with patch('builtins.print'):
+            await self.client.connect()
+            self.assertTrue(await self.client.wait_for_prompt("p1", timeout=5))
+
+        self.assertFalse(self.client._ws_task.done())
+        self.assertTrue(self.client.connected.is_set())
+
+    async def test_connected_cleared_when_socket_closes(self):
+        """서버가 연결을 끊으면 connected가 해제되는지 테스트"""
+        self.close_after_send = True
+        with patch('async_comfy_client.RECONNECT_DELAY', 60), patch('builtins.print'):
+            await self.client.connect()
+            self.assertTrue(await self.client.wait_for_prompt("p1", timeout=5))
+            for _ in range(100):
+                if not self.client.connected.is_set():
+                    break
+                await asyncio.sleep(0.01)
+
+        self.assertFalse(self.client.connected.is_set())
+        self.assertFalse(self.client._ws_task.done())
+
+
+class TestAsyncComfyUIClientUpload(unittest.IsolatedAsyncioTestCase):
+    """로컬 /upload/image, /view 서버로 업로드 캐시 확인 테스트"""
+
+    async def asyncSetUp(self):
+        """ComfyUI처럼 filename은 basename만, 폴더는 subfolder로 찾는 서버 시작"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "upload_cache.json")
+        self.image_path = os.path.join(self.temp_dir.name, "base_img.png")
+        with open(self.image_path, 'wb') as f:
+            f.write(b"test image data")
+        self.stored = set()
+        self.upload_count = 0
+
+        async def upload_handler(request):
+            form = await request.post()
+            self.upload_count += 1
+            name = form['image'].filename
+            self.stored.add(name)
+            return web.json_response({"name": name})
+
+        async def view_handler(request):
+            name = os.path.basename(request.query["filename"])
+            path = os.path.join(request.query.get("subfolder", ""), name)
+            return web.Response(status=200 if path in self.stored else 404)
+
+        app = web.Application()
+        app.router.add_post("/upload/image", upload_handler)
+        app.router.add_get("/view", view_handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.server_address = f"{self.server.host}:{self.server.port}"
+
+    async def asyncTearDown(self):
+        """서버 종료"""
+        await self.server.close()
+        self.temp_dir.cleanup()
+
+    async def _upload_with_new_client(self):
+        async with create_session() as session:
+            client = AsyncComfyUIClient(self.server_address, session)
+            return await client.upload_image(self.image_path, UploadCache(self.cache_path))
+
+    async def test_cache_persists_across_runs(self):
+        """다음 실행에서도 2d/ 폴더의 캐시된 파일을 찾아 다시 업로드하지 않는지 테스트"""
+        first = await self._upload_with_new_client()
+        second = await self._upload_with_new_client()
+
+        self.assertTrue(first.startswith("2d/base_img_"))
+        self.assertEqual(first, second)
+        self.assertEqual(self.upload_count, 1)
+
+    async def test_missing_on_server_reuploads(self):
+        """서버에서 파일이 사라졌으면 다시 업로드하는지 테스트"""
+        await self._upload_with_new_client()
+        self.stored.clear()
+        await self._upload_with_new_client()
+
+        self.assertEqual(self.upload_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
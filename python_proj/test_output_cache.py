@@ -0,0 +1,121 @@
+import unittest
+import os
+import json
+import tempfile
+from output_cache import OutputCache, find_outputs, job_key, reuse_outputs
+from workflow_processor import MappedWorkflowProcessor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestOutputCache(unittest.TestCase):
+    """생성 결과 캐시 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+
+        self.image_path = os.path.join(self.temp_dir.name, "base_img.png")
+        with open(self.image_path, 'wb') as f:
+            f.write(b"image-v1")
+        self.processor = MappedWorkflowProcessor(os.path.join(BASE_DIR, "test_03.json"))
+        self.prompt_data = {
+            "id": "0001",
+            "name": "test",
+            "image": self.image_path,
+            "positive_prompt": "test positive prompt",
+            "negative_prompt": "test negative prompt",
+            "is_processed": False
+        }
+
+    def tearDown(self):
+        """테스트 후 정리"""
+        os.chdir(self.original_cwd)
+        self.temp_dir.cleanup()
+
+    def _write_outputs(self, prompt_id, count=2):
+        paths = []
+        for idx in range(count):
+            path = f"{prompt_id}_{idx}.png"
+            with open(path, 'wb') as f:
+                f.write(f"{prompt_id}-{idx}".encode())
+            paths.append(path)
+        return paths
+
+    def test_job_key_ignores_non_input_fields(self):
+        """ID/이름/처리 여부는 작업 키에 영향을 주지 않는지 테스트"""
+        other = dict(self.prompt_data, id="0002", name="other", is_processed=True)
+
+        self.assertEqual(job_key(self.processor, self.prompt_data), job_key(self.processor, other))
+
+    def test_job_key_changes_with_inputs(self):
+        """프롬프트 문구, 이미지 내용, 템플릿(시드)이 바뀌면 작업 키가 달라지는지 테스트"""
+        original = job_key(self.processor, self.prompt_data)
+
+        changed_prompt = dict(self.prompt_data, positive_prompt="edited")
+        self.assertNotEqual(job_key(self.processor, changed_prompt), original)
+
+        with open(self.image_path, 'wb') as f:
+            f.write(b"image-v2")
+        self.assertNotEqual(job_key(self.processor, self.prompt_data), original)
+
+        with open(self.image_path, 'wb') as f:
+            f.write(b"image-v1")
+        with open(os.path.join(BASE_DIR, "test_03.json"), 'r') as f:
+            workflow_data = json.load(f)
+        workflow_data["9:0"]["inputs"]["seed"] += 1
+        reseeded_path = os.path.join(self.temp_dir.name, "test_03.json")
+        with open(reseeded_path, 'w') as f:
+            json.dump(workflow_data, f)
+        reseeded = MappedWorkflowProcessor(reseeded_path)
+        self.assertNotEqual(job_key(reseeded, self.prompt_data), original)
+
+    def test_cache_hit_and_change_detection(self):
+        """같은 키는 저장된 파일을 반환하고, 다른 키로 기록된 ID는 변경으로 판단하는지 테스트"""
+        cache = OutputCache(os.path.join(self.temp_dir.name, "cache.json"))
+        outputs = self._write_outputs("0001")
+        cache.set("key-a", "0001", outputs)
+
+        reloaded = OutputCache(os.path.join(self.temp_dir.name, "cache.json"))
+        self.assertEqual(reloaded.get("key-a", "0001"), outputs)
+        self.assertIsNone(reloaded.get("key-b", "0001"))
+        self.assertTrue(reloaded.is_changed("0001", "key-b"))
+        self.assertFalse(reloaded.is_changed("0002", "key-b"))
+
+    def test_cache_miss_when_output_deleted(self):
+        """출력 파일이 하나라도 없으면 캐시를 사용하지 않는지 테스트"""
+        cache = OutputCache()
+        outputs = self._write_outputs("0001")
+        cache.set("key-a", "0001", outputs)
+        os.remove(outputs[1])
+
+        self.assertIsNone(cache.get("key-a", "0001"))
+        self.assertTrue(cache.has_record("0001"))
+
+    def test_reuse_outputs_for_identical_job(self):
+        """다른 ID의 같은 작업 결과를 <ID>_<순번> 파일로 복사하는지 테스트"""
+        cache = OutputCache()
+        cache.set("key-a", "0001", self._write_outputs("0001"))
+
+        reused = reuse_outputs(cache.get("key-a", "0002"), "0002")
+
+        self.assertEqual(reused, ["0002_0.png", "0002_1.png"])
+        with open("0002_1.png", 'rb') as f:
+            self.assertEqual(f.read(), b"0001-1")
+
+    def test_find_outputs(self):
+        """디스크의 <ID>_<순번> 출력을 순번 순으로 찾고, 임시 파일과 다른 ID는 제외하는지 테스트"""
+        self._write_outputs("0001", count=3)
+        self._write_outputs("00010", count=1)
+        for name in ("0001_3.png.part", "0001_5.png"):
+            with open(name, 'wb') as f:
+                f.write(b"x")
+
+        self.assertEqual(find_outputs("0001"), ["0001_0.png", "0001_1.png", "0001_2.png"])
+        self.assertEqual(find_outputs("0002"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import json
+import tempfile
+from unittest.mock import patch
+from progress_journal import ProgressJournal, save_prompts
+
+
+class TestProgressJournal(unittest.TestCase):
+    """진행 저널 및 prompts.json 저장 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.temp_dir.name, "prompts.json.journal.jsonl")
+        self.journal = ProgressJournal(self.journal_path)
+
+    def tearDown(self):
+        """테스트 후 정리"""
+        self.journal.close()
+        self.temp_dir.cleanup()
+
+    def _write_torn_journal(self):
+        """완료된 한 줄 뒤에 비정상 종료로 잘린 줄이 남은 저널 작성"""
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"id": "0001", "outputs": ["0001_0.png"]}) + "\n")
+            f.write('{"id": "0002", "outp')
+
+    def test_replay_missing_journal(self):
+        """저널 파일이 없으면 빈 dict를 반환하는지 테스트"""
+        self.assertEqual(self.journal.replay(), {})
+
+    def test_replay_skips_torn_last_line(self):
+        """잘린 마지막 줄은 건너뛰고 완료된 기록만 재생하는지 테스트"""
+        self._write_torn_journal()
+
+        self.assertEqual(self.journal.replay(), {"0001": ["0001_0.png"]})
+
+    def test_record_after_torn_line(self):
+        """잘린 줄 뒤에 기록하면 줄바꿈 후 새 줄로 추가되어 재생되는지 테스트"""
+        self._write_torn_journal()
+
+        self.journal.record("0003", ["0003_0.png", "0003_1.png"])
+        self.journal.record("0004", [])
+        self.journal.close()
+
+        self.assertEqual(ProgressJournal(self.journal_path).replay(), {
+            "0001": ["0001_0.png"],
+            "0003": ["0003_0.png", "0003_1.png"],
+            "0004": [],
+        })
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.read().splitlines()), 4)
+
+    def test_apply_counts_restored_prompts(self):
+        """저널에 있는 미처리 프롬프트만 is_processed로 표시하고 개수를 반환하는지 테스트"""
+        self.journal.record("0001", ["0001_0.png"])
+        self.journal.record("0002", ["0002_0.png"])
+        prompts = [
+            {"id": "0001", "is_processed": False},
+            {"id": "0002", "is_processed": True},
+            {"id": "0003", "is_processed": False},
+        ]
+
+        self.assertEqual(ProgressJournal(self.journal_path).apply(prompts), 1)
+        self.assertEqual([p["is_processed"] for p in prompts], [True, True, False])
+
+    def test_clear_removes_journal(self):
+        """clear 후 저널 파일이 삭제되는지 테스트"""
+        self.journal.record("0001", [])
+        self.journal.clear()
+
+        self.assertFalse(os.path.exists(self.journal_path))
+
+
+class TestSavePrompts(unittest.TestCase):
+    """prompts.json 원자적 저장 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.prompts_path = os.path.join(self.temp_dir.name, "prompts.json")
+        self.original = [{"id": "0001", "is_processed": False}]
+        with open(self.prompts_path, 'w', encoding='utf-8') as f:
+            json.dump(self.original, f)
+
+    def tearDown(self):
+        """테스트 후 정리"""
+        self.temp_dir.cleanup()
+
+    def test_save_replaces_file(self):
+        """저장 후 새 내용으로 교체되고 임시 파일이 남지 않는지 테스트"""
+        prompts = [{"id": "0001", "is_processed": True, "name": "테스트"}]
+        save_prompts(self.prompts_path, prompts)
+
+        with open(self.prompts_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), prompts)
+        self.assertEqual(os.listdir(self.temp_dir.name), ["prompts.json"])
+
+    def test_failed_write_keeps_original(self):
+        """쓰는 도중 실패하면 기존 prompts.json이 그대로 남는지 테스트"""
+        with patch('progress_journal.json.dump', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                save_prompts(self.prompts_path, [{"id": "0001", "is_processed": True}])
+
+        with open(self.prompts_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), self.original)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import json
+import tempfile
+from run_profiler import RunProfiler
+
+
+class TestRunProfiler(unittest.TestCase):
+    """실행 프로파일러 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.report_path = os.path.join(self.temp_dir.name, "report.jsonl")
+        self.profiler = RunProfiler(self.report_path, {"3": "KSampler", "8": "VAEDecode"})
+
+    def tearDown(self):
+        """테스트 후 정리"""
+        self.profiler.close()
+        self.temp_dir.cleanup()
+
+    def _run_prompt(self, prompt_id, submitted, started, node_times, finished):
+        """WebSocket 이벤트 순서대로 프롬프트 하나 실행을 재현"""
+        server = "127.0.0.1:8188"
+        self.profiler.prompt_submitted(prompt_id, server, f"id-{prompt_id}", submitted)
+        self.profiler.on_event(server, "execution_start", {"prompt_id": prompt_id}, started)
+        for node, timestamp in node_times:
+            self.profiler.on_event(server, "executing", {"node": node, "prompt_id": prompt_id}, timestamp)
+        self.profiler.on_event(server, "executing", {"node": None, "prompt_id": prompt_id}, finished)
+
+    def test_prompt_record(self):
+        """큐 대기/실행/다운로드/노드별 시간이 JSONL에 기록되는지 테스트"""
+        self._run_prompt("p1", 100.0, 101.0, [("3", 101.0), ("8", 104.0)], 104.5)
+        record = self.profiler.prompt_downloaded("p1", ["a.png", "b.png"], 104.6, 105.6)
+
+        self.assertEqual(record["id"], "id-p1")
+        self.assertAlmostEqual(record["queue_wait"], 1.0)
+        self.assertAlmostEqual(record["execution"], 3.5)
+        self.assertAlmostEqual(record["download"], 1.0)
+        self.assertEqual(
+            [(n["node"], n["class_type"], round(n["seconds"], 3)) for n in record["nodes"]],
+            [("3", "KSampler", 3.0), ("8", "VAEDecode", 0.5)],
+        )
+
+        with open(self.report_path, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(lines, [record])
+
+    def test_history_timestamps_without_websocket(self):
+        """WebSocket 이벤트가 없으면 history status 메시지로 실행 시간을 계산하는지 테스트"""
+        self.profiler.prompt_submitted("p1", "127.0.0.1:8188", "id-p1", 100.0)
+        history_entry = {"status": {"messages": [
+            ["execution_start", {"prompt_id": "p1", "timestamp": 102000}],
+            ["execution_success", {"prompt_id": "p1", "timestamp": 105000}],
+        ]}}
+        record = self.profiler.prompt_downloaded("p1", ["a.png"], 106.0, 106.5, history_entry)
+
+        self.assertAlmostEqual(record["queue_wait"], 2.0)
+        self.assertAlmostEqual(record["execution"], 3.0)
+        self.assertEqual(record["nodes"], [])
+
+    def test_summary_gpu_idle_and_slowest_nodes(self):
+        """서버별 GPU 유휴 구간과 느린 노드 순위를 요약하는지 테스트"""
+        self._run_prompt("p1", 100.0, 100.0, [("3", 100.0), ("8", 103.0)], 104.0)
+        self.profiler.prompt_downloaded("p1", ["a.png"], 104.0, 105.0)
+        self._run_prompt("p2", 100.0, 106.0, [("3", 106.0), ("8", 108.0)], 110.0)
+        self.profiler.prompt_downloaded("p2", ["b.png"], 110.0, 111.0)
+
+        summary = self.profiler.summary()
+        gpu = summary["gpu"]["127.0.0.1:8188"]
+
+        self.assertEqual(summary["images"], 2)
+        self.assertAlmostEqual(gpu["idle_seconds"], 2.0)
+        self.assertAlmostEqual(gpu["max_idle_gap"], 2.0)
+        self.assertAlmostEqual(gpu["utilization"], 8.0 / 10.0)
+        self.assertEqual(summary["slowest_nodes"][0]["node"], "3")
+        self.assertAlmostEqual(summary["slowest_nodes"][0]["total"], 5.0)
+
+    def test_ignores_events_without_prompt(self):
+        """prompt_id가 없는 이벤트(status 등)는 무시하는지 테스트"""
+        self.profiler.on_event("127.0.0.1:8188", "status", {"status": {}}, 100.0)
+        self.profiler.on_event("127.0.0.1:8188", "progress", None, 100.0)
+
+        self.assertEqual(self.profiler.summary()["prompts"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch, MagicMock
+from upload_cache import UploadCache, view_params
+from workflow_processor import Test02WorkflowProcessor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_URL = "http://127.0.0.1:8188"
+
+
+class TestUploadCache(unittest.TestCase):
+    """이미지 업로드 캐시 테스트 (서버 연결 없음)"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "upload_cache.json")
+        self.image_path = os.path.join(self.temp_dir.name, "base_img.png")
+        with open(self.image_path, 'wb') as f:
+            f.write(b"test image data")
+
+        self.session = MagicMock()
+        self.session.post.side_effect = self._fake_upload
+        self.session.head.return_value = MagicMock(status_code=200)
+        patcher = patch('workflow_processor.get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """테스트 후 정리"""
+        self.temp_dir.cleanup()
+
+    def _fake_upload(self, url, files):
+        """업로드한 2d/<파일명>을 그대로 돌려주는 /upload/image 응답"""
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"name": files['image'][0]}
+        return response
+
+    def _processor(self, cache):
+        return Test02WorkflowProcessor(os.path.join(BASE_DIR, "test_02.json"), SERVER_URL, upload_cache=cache)
+
+    def test_view_params_splits_subfolder(self):
+        """/view 확인 파라미터가 폴더를 subfolder로 분리하는지 테스트"""
+        self.assertEqual(
+            view_params("2d/base_img_0123456789ab.png"),
+            {"filename": "base_img_0123456789ab.png", "subfolder": "2d", "type": "input"},
+        )
+        self.assertEqual(view_params("base_img.png")["subfolder"], "")
+
+    def test_cache_hit_skips_upload(self):
+        """같은 내용은 한 번만 업로드하고, 해시를 붙인 2d/ 파일명을 재사용하는지 테스트"""
+        processor = self._processor(UploadCache(self.cache_path))
+
+        first = processor.upload_image(self.image_path)
+        second = processor.upload_image(self.image_path)
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("2d/base_img_"))
+        self.assertEqual(self.session.post.call_count, 1)
+        # 이번 실행에서 업로드한 항목은 다시 확인하지 않음
+        self.session.head.assert_not_called()
+
+    def test_cache_persists_across_reload(self):
+        """다음 실행에서 캐시를 다시 읽으면 /view 확인 한 번 후 업로드하지 않는지 테스트"""
+        uploaded_name = self._processor(UploadCache(self.cache_path)).upload_image(self.image_path)
+
+        processor = self._processor(UploadCache(self.cache_path))
+        self.assertEqual(processor.upload_image(self.image_path), uploaded_name)
+        self.assertEqual(processor.upload_image(self.image_path), uploaded_name)
+
+        self.assertEqual(self.session.post.call_count, 1)
+        self.session.head.assert_called_once_with(f"{SERVER_URL}/view", params=view_params(uploaded_name))
+
+    def test_missing_on_server_reuploads(self):
+        """/view가 404면 캐시 항목을 버리고 다시 업로드하는지 테스트"""
+        self._processor(UploadCache(self.cache_path)).upload_image(self.image_path)
+        self.session.head.return_value = MagicMock(status_code=404)
+
+        cache = UploadCache(self.cache_path)
+        uploaded_name = self._processor(cache).upload_image(self.image_path)
+
+        self.assertEqual(self.session.post.call_count, 2)
+        self.assertEqual(UploadCache(self.cache_path).get(SERVER_URL, cache.content_hash(self.image_path)), uploaded_name)
+
+    def test_changed_content_gets_new_name(self):
+        """같은 경로라도 내용이 바뀌면 다른 파일명으로 업로드하는지 테스트"""
+        processor = self._processor(UploadCache(self.cache_path))
+        first = processor.upload_image(self.image_path)
+
+        with open(self.image_path, 'wb') as f:
+            f.write(b"changed image data")
+        os.utime(self.image_path, ns=(0, 0))
+        second = processor.upload_image(self.image_path)
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.session.post.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
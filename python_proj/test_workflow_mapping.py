@@ -0,0 +1,147 @@
+import unittest
+import os
+import json
+from unittest.mock import patch
+from workflow_processor import (
+    MappedWorkflowProcessor,
+    Test01WorkflowProcessor,
+    Test02WorkflowProcessor,
+    Test03WorkflowProcessor,
+    WildcardAnimationWorkflowProcessor,
+    WorkflowProcessorFactory,
+    compile_mapping,
+    load_workflow_mappings,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 기존 처리기 클래스와 매핑 처리기를 비교할 워크플로우
+LEGACY_PROCESSORS = {
+    "test_01.json": Test01WorkflowProcessor,
+    "test_02.json": Test02WorkflowProcessor,
+    "test_03.json": Test03WorkflowProcessor,
+    "wildcard_animation.json": WildcardAnimationWorkflowProcessor,
+}
+
+
+class TestWorkflowMapping(unittest.TestCase):
+    """선언적 워크플로우 매핑 테스트"""
+
+    def setUp(self):
+        """테스트 전 설정"""
+        self.prompt_data = {
+            "image": "2d/base_img.png",
+            "positive_prompt": "test positive prompt",
+            "negative_prompt": "test negative prompt"
+        }
+
+    def _workflow_path(self, workflow_file):
+        return os.path.join(BASE_DIR, workflow_file)
+
+    @patch('workflow_processor.WorkflowProcessor.upload_image')
+    def test_mapping_matches_legacy_processors(self, mock_upload):
+        """매핑 처리기 결과가 기존 처리기 클래스 결과와 같은지 테스트"""
+        mock_upload.return_value = "2d/uploaded_image.png"
+
+        for workflow_file, legacy_class in LEGACY_PROCESSORS.items():
+            with self.subTest(workflow=workflow_file):
+                legacy = legacy_class(self._workflow_path(workflow_file))
+                mapped = MappedWorkflowProcessor(self._workflow_path(workflow_file))
+
+                legacy.modify_prompt(self.prompt_data)
+                mapped.modify_prompt(self.prompt_data)
+
+                self.assertEqual(mapped.get_workflow(), legacy.get_workflow())
+
+    @patch('workflow_processor.WorkflowProcessor.upload_image')
+    def test_mapping_matches_legacy_processors_without_image(self, mock_upload):
+        """이미지가 없는 프롬프트도 기존 처리기와 같게 처리되는지 테스트"""
+        prompt_data = {k: v for k, v in self.prompt_data.items() if k != "image"}
+
+        for workflow_file, legacy_class in LEGACY_PROCESSORS.items():
+            with self.subTest(workflow=workflow_file):
+                legacy = legacy_class(self._workflow_path(workflow_file))
+                mapped = MappedWorkflowProcessor(self._workflow_path(workflow_file))
+
+                legacy.modify_prompt(prompt_data)
+                mapped.modify_prompt(prompt_data)
+
+                self.assertEqual(mapped.get_workflow(), legacy.get_workflow())
+        mock_upload.assert_not_called()
+
+    @patch('workflow_processor.WorkflowProcessor.upload_image')
+    def test_mapping_reuses_template_across_prompts(self, mock_upload):
+        """같은 템플릿에 여러 프롬프트를 연속 적용해도 마지막 값만 반영되는지 테스트"""
+        mock_upload.return_value = "2d/uploaded_image.png"
+        mapped = MappedWorkflowProcessor(self._workflow_path("test_03.json"))
+
+        mapped.modify_prompt(self.prompt_data)
+        mapped.modify_prompt({"positive_prompt": "second", "negative_prompt": "second negative"})
+
+        self.assertEqual(mapped.get_workflow()["5"]["inputs"]["prompt"], "second")
+        self.assertEqual(mapped.get_workflow()["4"]["inputs"]["text"], "second negative")
+        self.assertEqual(mapped.get_workflow()["7"]["inputs"]["image"], "2d/uploaded_image.png")
+
+    @patch('workflow_processor.WorkflowProcessor.upload_image')
+    def test_encoded_request_matches_legacy_processors(self, mock_upload):
+        """템플릿+오버레이로 인코딩한 요청이 기존 처리기의 수정 결과와 같은지 테스트"""
+        mock_upload.return_value = "2d/uploaded_image.png"
+
+        for workflow_file, legacy_class in LEGACY_PROCESSORS.items():
+            with self.subTest(workflow=workflow_file):
+                legacy = legacy_class(self._workflow_path(workflow_file))
+                mapped = MappedWorkflowProcessor(self._workflow_path(workflow_file))
+                original = json.loads(json.dumps(mapped.get_workflow()))
+
+                legacy.modify_prompt(self.prompt_data)
+                request = json.loads(mapped.encode_prompt_request(self.prompt_data, "client-1"))
+
+                self.assertEqual(request["prompt"], legacy.get_workflow())
+                self.assertEqual(request["client_id"], "client-1")
+                # 템플릿 방식은 처리기의 workflow_data를 수정하지 않음
+                self.assertEqual(mapped.get_workflow(), original)
+
+    def test_template_overlay_does_not_leak_between_prompts(self):
+        """오버레이에 없는 항목은 이전 프롬프트 값이 아니라 템플릿 값을 사용하는지 테스트"""
+        mapped = MappedWorkflowProcessor(self._workflow_path("test_01.json"))
+        template = mapped.template
+
+        first = template.to_dict({("6", "text"): "first \"quoted\" 한글"})
+        second = template.to_dict({})
+
+        self.assertEqual(first["6"]["inputs"]["text"], 'first "quoted" 한글')
+        self.assertEqual(second["6"]["inputs"]["text"], mapped.get_workflow()["6"]["inputs"]["text"])
+
+    def test_compile_mapping_unknown_node(self):
+        """워크플로우에 없는 노드를 매핑하면 컴파일 시 실패하는지 테스트"""
+        with open(self._workflow_path("test_01.json"), 'r') as f:
+            workflow_data = json.load(f)
+
+        with self.assertRaises(ValueError) as context:
+            compile_mapping(workflow_data, [{"field": "positive_prompt", "node": "999", "input": "text"}])
+
+        self.assertIn("노드가 없습니다", str(context.exception))
+
+    def test_compile_mapping_unknown_input(self):
+        """노드에 없는 입력을 매핑하면 컴파일 시 실패하는지 테스트"""
+        with open(self._workflow_path("test_01.json"), 'r') as f:
+            workflow_data = json.load(f)
+
+        with self.assertRaises(ValueError) as context:
+            compile_mapping(workflow_data, [{"field": "positive_prompt", "node": "6", "input": "missing"}])
+
+        self.assertIn("입력이 없습니다", str(context.exception))
+
+    def test_factory_uses_mapping(self):
+        """매핑이 등록된 워크플로우는 팩토리가 매핑 처리기를 만드는지 테스트"""
+        mappings = load_workflow_mappings()
+
+        for workflow_file in LEGACY_PROCESSORS:
+            with self.subTest(workflow=workflow_file):
+                self.assertIn(workflow_file, mappings)
+                processor = WorkflowProcessorFactory.create_processor(self._workflow_path(workflow_file))
+                self.assertIsInstance(processor, MappedWorkflowProcessor)
+
+
+if __name__ == '__main__':
+    unittest.main()
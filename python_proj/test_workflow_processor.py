@@ -47,7 +47,7 @@ class TestWorkflowProcessor(unittest.TestCase):
         self.assertTrue(isinstance(result, str))
         self.assertTrue(len(result) > 0)
     
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_upload_image_failure(self, mock_post):
         """이미지 업로드 실패 테스트"""
         # Mock 응답 설정
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """파일 내용의 SHA-256 (청크 단위로 읽어 큰 파일도 메모리를 적게 사용)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def view_params(uploaded_name):
+    """업로드된 파일명(예: 2d/<이름>_<해시>.png)을 확인하는 /view 요청 파라미터
+
+    /view는 filename을 basename으로 줄이므로 폴더 부분은 subfolder로 따로 보내야 합니다.
+    """
+    return {
+        "filename": os.path.basename(uploaded_name),
+        "subfolder": os.path.dirname(uploaded_name),
+        "type": "input",
+    }
+
+
+class UploadCache:
+    """ComfyUI 서버별로 업로드한 이미지를 내용 해시로 기록하는 캐시
+
+    - 키: (서버 URL, 파일 내용 SHA-256) → 값: 서버에 업로드된 파일명
+    - path가 주어지면 JSON 파일로 저장하여 다음 실행에서도 재사용합니다
+    - 같은 파일의 해시는 (경로, 크기, 수정 시각)이 같으면 다시 계산하지 않습니다
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._hashes = {}
+        # 이번 실행에서 서버에 실제로 있는지 확인한 키
+        self._verified = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def _key(server_url, content_hash):
+        return f"{server_url}|{content_hash}"
+
+    def content_hash(self, image_path):
+        stat = os.stat(image_path)
+        signature = (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(signature)
+        if cached is None:
+            cached = file_sha256(image_path)
+            with self._lock:
+                self._hashes[signature] = cached
+        return cached
+
+    def get(self, server_url, content_hash):
+        with self._lock:
+            return self._entries.get(self._key(server_url, content_hash))
+
+    def is_verified(self, server_url, content_hash):
+        with self._lock:
+            return self._key(server_url, content_hash) in self._verified
+
+    def set(self, server_url, content_hash, uploaded_name):
+        """업로드 결과 기록 (path가 있으면 파일에도 저장)"""
+        key = self._key(server_url, content_hash)
+        with self._lock:
+            self._entries[key] = uploaded_name
+            self._verified.add(key)
+            if self.path:
+                self._save()
+
+    def mark_verified(self, server_url, content_hash):
+        with self._lock:
+            self._verified.add(self._key(server_url, content_hash))
+
+    def discard(self, server_url, content_hash):
+        """서버에서 사라진 항목 제거"""
+        key = self._key(server_url, content_hash)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._verified.discard(key)
+            if self.path:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
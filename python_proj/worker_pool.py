@@ -0,0 +1,146 @@
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_queue_remaining(server_address, timeout=5):
+    """ComfyUI 서버 큐에 남은 프롬프트 수 (실행 중 + 대기)"""
+    with urllib.request.urlopen(f"http://{server_address}/prompt", timeout=timeout) as response:
+        return json.loads(response.read())['exec_info']['queue_remaining']
+
+
+class ServerState:
+    """워커 풀에 등록된 ComfyUI 서버 하나의 상태"""
+
+    def __init__(self, address, processors):
+        self.address = address
+        # 서버별 처리기 (동시 작업마다 하나씩, workflow_data를 작업 간에 공유하지 않음)
+        self.idle_processors = list(processors)
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+
+class ComfyUIWorkerPool:
+    """여러 ComfyUI 서버에 프롬프트를 분배하는 워커 풀
+
+    서버마다 max_in_flight개까지 작업을 동시에 맡기고, 새 작업은 빈 자리가 있는 서버 중
+    (이 풀이 맡긴 작업 수 + 서버 큐 길이)가 가장 작은 서버로 보냅니다.
+    다른 클라이언트가 같은 서버를 쓰고 있어도 큐 길이로 부하를 반영합니다.
+    """
+
+    def __init__(self, servers, create_processor, max_in_flight=1, queue_depth=get_queue_remaining):
+        """
+        Args:
+            servers: ComfyUI 서버 주소 목록 ("host:port")
+            create_processor: 서버 URL("http://host:port")을 받아 워크플로우 처리기를 만드는 함수
+            max_in_flight: 서버당 동시 작업 수
+            queue_depth: 서버 주소를 받아 서버 큐 길이를 반환하는 함수 (실패 시 0으로 간주)
+        """
+        if not servers:
+            raise ValueError("ComfyUI 서버가 하나 이상 필요합니다")
+        self.max_in_flight = max_in_flight
+        self.queue_depth = queue_depth
+        self.servers = [
+            ServerState(address, [create_processor(f"http://{address}") for _ in range(max_in_flight)])
+            for address in servers
+        ]
+        self._condition = threading.Condition()
+
+    def _remote_depth(self, server):
+        try:
+            return self.queue_depth(server.address)
+        except Exception as e:
+            print(f"큐 상태 조회 실패 ({server.address}): {e}")
+            return 0
+
+    def _acquire(self):
+        """빈 자리가 있는 서버 중 부하가 가장 낮은 서버와 처리기 확보 (없으면 대기)
+
+        run()의 분배 루프에서만 호출되므로 대기 후 고른 후보의 빈 자리는 사라지지 않습니다.
+        """
+        with self._condition:
+            while not any(s.idle_processors for s in self.servers):
+                self._condition.wait()
+            candidates = [s for s in self.servers if s.idle_processors]
+
+        # 큐 길이 조회는 네트워크 호출이므로 잠금 밖에서 수행
+        loads = {s.address: self._remote_depth(s) for s in candidates} if len(candidates) > 1 else {}
+
+        with self._condition:
+            server = min(candidates, key=lambda s: s.in_flight + loads.get(s.address, 0))
+            server.in_flight += 1
+            return server, server.idle_processors.pop()
+
+    def _release(self, server, processor, success):
+        with self._condition:
+            server.idle_processors.append(processor)
+            server.in_flight -= 1
+            if success:
+                server.completed += 1
+            else:
+                server.failed += 1
+            self._condition.notify()
+
+    def run(self, prompts, handle, finish=None, finish_workers=4):
+        """prompts를 서버들에 분배해 handle(server_address, processor, prompt) 실행
+
+        finish(server_address, prompt, handle 결과)가 주어지면 handle이 끝나 서버 자리를 반납한 뒤
+        별도 스레드에서 실행하고 그 결과를 넘깁니다. 예를 들어 handle은 큐 등록과 실행 완료 대기,
+        finish는 다운로드/저장을 맡아 GPU가 다운로드 동안 쉬지 않게 합니다.
+
+        완료되는 순서대로 (prompt, result, error)를 yield합니다. 실패한 작업은 error에 예외가 담깁니다.
+        """
+        results = []
+        results_ready = threading.Condition()
+
+        def _report(prompt, result, error):
+            with results_ready:
+                results.append((prompt, result, error))
+                results_ready.notify()
+
+        def _finish(server, prompt, handled):
+            try:
+                _report(prompt, finish(server.address, prompt, handled), None)
+            except Exception as e:
+                _report(prompt, None, e)
+
+        def _work(server, processor, prompt):
+            try:
+                result, error = handle(server.address, processor, prompt), None
+            except Exception as e:
+                result, error = None, e
+            self._release(server, processor, error is None)
+            if finish is not None and error is None:
+                finish_executor.submit(_finish, server, prompt, result)
+            else:
+                _report(prompt, result, error)
+
+        total = len(prompts)
+        workers = len(self.servers) * self.max_in_flight
+        with ThreadPoolExecutor(max_workers=workers) as executor, \
+                ThreadPoolExecutor(max_workers=finish_workers) as finish_executor:
+            yielded = 0
+            for prompt in prompts:
+                server, processor = self._acquire()
+                executor.submit(_work, server, processor, prompt)
+                # 분배하는 동안 끝난 결과를 바로 넘김
+                with results_ready:
+                    pending, results[:] = list(results), []
+                for item in pending:
+                    yielded += 1
+                    yield item
+
+            while yielded < total:
+                with results_ready:
+                    while not results:
+                        results_ready.wait()
+                    pending, results[:] = list(results), []
+                for item in pending:
+                    yielded += 1
+                    yield item
+
+    def summary(self):
+        """서버별 처리 결과 요약"""
+        return {s.address: {"completed": s.completed, "failed": s.failed} for s in self.servers}
@@ -2,13 +2,32 @@ from abc import ABC, abstractmethod
 import json
 import requests
 import os
+import threading
+from typing import NamedTuple
+from upload_cache import view_params
+from workflow_template import WorkflowTemplate
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """ComfyUI 요청에 공유하는 requests.Session (keep-alive 연결 재사용)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        return _session
+
 
 class WorkflowProcessor(ABC):
     """워크플로우 처리를 위한 추상 기본 클래스"""
     
-    def __init__(self, workflow_file, comfyui_url="http://192.168.50.213:8188"):
+    def __init__(self, workflow_file, comfyui_url="http://192.168.50.213:8188", upload_cache=None):
         self.workflow_file = workflow_file
         self.comfyui_url = comfyui_url
+        # 업로드 캐시 (upload_cache.UploadCache). 없으면 매번 업로드
+        self.upload_cache = upload_cache
         self.workflow_data = self._load_workflow()
     
     def _load_workflow(self):
@@ -17,27 +36,60 @@ class WorkflowProcessor(ABC):
             return json.load(f)
     
     def upload_image(self, image_path):
-        """이미지를 ComfyUI 서버에 업로드"""
+        """이미지를 ComfyUI 서버에 업로드
+
+        업로드 캐시가 있으면 내용 해시를 붙인 파일명으로 올리고, 같은 내용을 이미 올린 서버에는
+        다시 보내지 않습니다. 캐시 항목은 실행마다 처음 한 번 서버에 파일이 있는지 확인합니다.
+        """
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}")
-            
+
+        filename = os.path.basename(image_path)
+        content_hash = None
+        if self.upload_cache is not None:
+            content_hash = self.upload_cache.content_hash(image_path)
+            cached_name = self.upload_cache.get(self.comfyui_url, content_hash)
+            if cached_name and self._is_uploaded(cached_name, content_hash):
+                return cached_name
+            # 내용이 다르면 파일명도 달라지도록 해시를 붙임 (같은 이름 덮어쓰기로 다른 항목이 깨지지 않음)
+            stem, ext = os.path.splitext(filename)
+            filename = f"{stem}_{content_hash[:12]}{ext}"
+
         url = f"{self.comfyui_url}/upload/image"
         
         with open(image_path, 'rb') as f:
             # 파일명에 2d 폴더 경로 추가
-            filename = os.path.basename(image_path)
             files = {
                 'image': (f"2d/{filename}", f, 'image/png'),
                 'overwrite': (None, 'true')
             }
             
-            response = requests.post(url, files=files)
+            response = get_session().post(url, files=files)
             
             if response.status_code == 200:
                 result = response.json()
+                if content_hash is not None:
+                    self.upload_cache.set(self.comfyui_url, content_hash, result['name'])
                 return result['name']  # 업로드된 파일명 반환
             else:
                 raise Exception(f"이미지 업로드 실패: {response.status_code}")
+
+    def _is_uploaded(self, uploaded_name, content_hash):
+        """캐시된 파일이 서버 input 폴더에 아직 있는지 확인 (실행마다 한 번)"""
+        if self.upload_cache.is_verified(self.comfyui_url, content_hash):
+            return True
+        try:
+            response = get_session().head(
+                f"{self.comfyui_url}/view",
+                params=view_params(uploaded_name),
+            )
+        except requests.RequestException:
+            return False
+        if response.status_code == 200:
+            self.upload_cache.mark_verified(self.comfyui_url, content_hash)
+            return True
+        self.upload_cache.discard(self.comfyui_url, content_hash)
+        return False
     
     @abstractmethod
     def modify_prompt(self, prompt_data):
@@ -48,6 +100,14 @@ class WorkflowProcessor(ABC):
         """수정된 워크플로우 반환"""
         return self.workflow_data
 
+    def encode_prompt_request(self, prompt_data, client_id=None):
+        """프롬프트를 반영한 /prompt 요청 본문(bytes)
+
+        기본 구현은 workflow_data를 직접 수정한 뒤 인코딩하므로 처리기 하나를 여러 작업이 동시에 쓰면 안 됩니다.
+        """
+        self.modify_prompt(prompt_data)
+        return json.dumps({"prompt": self.get_workflow(), "client_id": client_id}).encode('utf-8')
+
 
 class Test01WorkflowProcessor(WorkflowProcessor):
     """test_01.json 워크플로우 처리기"""
@@ -106,19 +166,105 @@ class WildcardAnimationWorkflowProcessor(WorkflowProcessor):
         self.workflow_data["6"]["inputs"]["prompt"] = prompt_data["negative_prompt"]
 
 
+# 워크플로우 파일명별 노드 매핑 (새 워크플로우는 이 파일에 항목만 추가)
+WORKFLOW_MAPPINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workflow_mappings.json")
+
+
+class PatchOp(NamedTuple):
+    """컴파일된 패치 연산: prompt_data[field] 값을 inputs[input_name]에 대입"""
+    field: str
+    node_id: str
+    inputs: dict  # 워크플로우 템플릿 노드의 inputs dict (직접 참조)
+    input_name: str
+    upload: bool  # 값이 로컬 이미지 경로라 업로드 후 서버 파일명을 넣어야 하는지
+
+
+def load_workflow_mappings(path=WORKFLOW_MAPPINGS_FILE):
+    """워크플로우 매핑 파일 로드. 없으면 빈 dict"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compile_mapping(workflow_data, mapping):
+    """매핑 항목({"field", "node", "input", "upload"})을 워크플로우에 대한 패치 연산 목록으로 변환
+
+    노드와 입력 이름은 여기서 한 번만 검증하고, 각 연산은 노드 inputs dict를 직접 참조하므로
+    프롬프트마다 dict 조회 없이 값만 대입합니다.
+    """
+    ops = []
+    for entry in mapping:
+        node_id = str(entry["node"])
+        input_name = entry["input"]
+        if node_id not in workflow_data:
+            raise ValueError(f"워크플로우에 노드가 없습니다: {node_id}")
+        inputs = workflow_data[node_id]["inputs"]
+        if input_name not in inputs:
+            raise ValueError(f"노드 {node_id}에 입력이 없습니다: {input_name}")
+        ops.append(PatchOp(entry["field"], node_id, inputs, input_name, bool(entry.get("upload", False))))
+    return ops
+
+
+class MappedWorkflowProcessor(WorkflowProcessor):
+    """workflow_mappings.json의 선언적 매핑으로 동작하는 워크플로우 처리기
+
+    업로드 항목은 prompt_data에 값이 있을 때만 적용하고(기존 처리기의 "image" 처리와 동일),
+    그 외 항목은 값이 없으면 KeyError가 발생합니다.
+
+    encode_prompt_request()는 workflow_data를 건드리지 않고 불변 템플릿에 오버레이만 끼워 넣으므로
+    처리기 하나로 여러 프롬프트를 동시에 준비할 수 있습니다.
+    """
+
+    def __init__(self, workflow_file, comfyui_url="http://192.168.50.213:8188", upload_cache=None, mapping=None):
+        super().__init__(workflow_file, comfyui_url, upload_cache)
+        if mapping is None:
+            mapping = load_workflow_mappings().get(os.path.basename(workflow_file))
+            if mapping is None:
+                raise ValueError(f"워크플로우 매핑이 없습니다: {workflow_file}")
+        self.patch_ops = compile_mapping(self.workflow_data, mapping)
+        self.template = WorkflowTemplate(self.workflow_data, [(op.node_id, op.input_name) for op in self.patch_ops])
+
+    def build_overlay(self, prompt_data):
+        """prompt_data를 {(node_id, input_name): 값} 오버레이로 변환 (업로드 항목은 업로드 후 서버 파일명)"""
+        overlay = {}
+        for op in self.patch_ops:
+            if op.upload:
+                if op.field in prompt_data:
+                    overlay[(op.node_id, op.input_name)] = self.upload_image(prompt_data[op.field])
+            else:
+                overlay[(op.node_id, op.input_name)] = prompt_data[op.field]
+        return overlay
+
+    def encode_prompt_request(self, prompt_data, client_id=None):
+        return self.template.render_request(self.build_overlay(prompt_data), client_id)
+
+    def modify_prompt(self, prompt_data):
+        for op in self.patch_ops:
+            if op.upload:
+                if op.field in prompt_data:
+                    op.inputs[op.input_name] = self.upload_image(prompt_data[op.field])
+            else:
+                op.inputs[op.input_name] = prompt_data[op.field]
+
+
 class WorkflowProcessorFactory:
     """워크플로우 처리기 팩토리 클래스"""
     
     @staticmethod
-    def create_processor(workflow_file, comfyui_url="http://192.168.50.213:8188"):
-        """워크플로우 파일에 맞는 처리기 생성"""
+    def create_processor(workflow_file, comfyui_url="http://192.168.50.213:8188", upload_cache=None):
+        """워크플로우 파일에 맞는 처리기 생성 (workflow_mappings.json에 매핑이 있으면 매핑 처리기)"""
+        mapping = load_workflow_mappings().get(os.path.basename(workflow_file))
+        if mapping is not None:
+            return MappedWorkflowProcessor(workflow_file, comfyui_url, upload_cache, mapping)
+
         if workflow_file == "test_01.json":
-            return Test01WorkflowProcessor(workflow_file, comfyui_url)
+            return Test01WorkflowProcessor(workflow_file, comfyui_url, upload_cache)
         if workflow_file == "test_02.json":
-            return Test02WorkflowProcessor(workflow_file, comfyui_url)
+            return Test02WorkflowProcessor(workflow_file, comfyui_url, upload_cache)
         if workflow_file == "test_03.json":
-            return Test03WorkflowProcessor(workflow_file, comfyui_url)
+            return Test03WorkflowProcessor(workflow_file, comfyui_url, upload_cache)
         elif workflow_file == "wildcard_animation.json":
-            return WildcardAnimationWorkflowProcessor(workflow_file, comfyui_url)
+            return WildcardAnimationWorkflowProcessor(workflow_file, comfyui_url, upload_cache)
         else:
             raise ValueError(f"지원하지 않는 워크플로우 파일: {workflow_file}") 
\ No newline at end of file
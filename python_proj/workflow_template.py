@@ -0,0 +1,75 @@
+import copy
+import json
+import re
+
+# 미리 인코딩한 JSON에서 패치 위치를 표시하는 자리표시자 ("__HONEY_PATCH_3__" 형태)
+_PLACEHOLDER = "__HONEY_PATCH_{}__"
+_PLACEHOLDER_PATTERN = re.compile(r'"__HONEY_PATCH_(\d+)__"')
+
+
+class WorkflowTemplate:
+    """변경하지 않는 워크플로우 템플릿 + 프롬프트별 오버레이
+
+    템플릿은 생성 시 패치 위치에 자리표시자를 넣어 한 번만 JSON으로 인코딩하고 조각으로 나눠 둡니다.
+    프롬프트마다 오버레이(패치 위치 → 값)만 인코딩해 조각 사이에 끼워 넣으므로 전체 그래프를
+    복사하거나 다시 인코딩하지 않고, 템플릿을 여러 스레드가 동시에 사용해도 안전합니다.
+    """
+
+    def __init__(self, workflow_data, patch_points):
+        """
+        Args:
+            workflow_data: API 형식 워크플로우 dict (복사해서 사용하며 원본은 변경하지 않음)
+            patch_points: 프롬프트마다 바뀌는 (node_id, input_name) 목록
+        """
+        self.patch_points = [(str(node_id), input_name) for node_id, input_name in patch_points]
+        self._index = {point: i for i, point in enumerate(self.patch_points)}
+        self.defaults = []
+
+        skeleton = copy.deepcopy(workflow_data)
+        for i, (node_id, input_name) in enumerate(self.patch_points):
+            inputs = skeleton[node_id]["inputs"]
+            self.defaults.append(inputs[input_name])
+            inputs[input_name] = _PLACEHOLDER.format(i)
+
+        self._prompt_segments, self._prompt_slots = self._split(json.dumps(skeleton))
+        request_skeleton = json.dumps({"prompt": skeleton, "client_id": _PLACEHOLDER.format(len(self.patch_points))})
+        self._request_segments, self._request_slots = self._split(request_skeleton)
+
+    @staticmethod
+    def _split(encoded):
+        """인코딩된 JSON을 자리표시자 기준 조각과 자리 순서로 분리"""
+        segments, slots, last = [], [], 0
+        for match in _PLACEHOLDER_PATTERN.finditer(encoded):
+            segments.append(encoded[last:match.start()])
+            slots.append(int(match.group(1)))
+            last = match.end()
+        segments.append(encoded[last:])
+        return segments, slots
+
+    def _encoded_values(self, overlay):
+        values = list(self.defaults)
+        for point, value in overlay.items():
+            values[self._index[(str(point[0]), point[1])]] = value
+        return [json.dumps(value) for value in values]
+
+    @staticmethod
+    def _join(segments, slots, encoded_values):
+        parts = [segments[0]]
+        for slot, segment in zip(slots, segments[1:]):
+            parts.append(encoded_values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def render(self, overlay):
+        """오버레이({(node_id, input_name): 값})를 적용한 워크플로우 JSON 문자열. 없는 항목은 템플릿 값 사용"""
+        return self._join(self._prompt_segments, self._prompt_slots, self._encoded_values(overlay))
+
+    def render_request(self, overlay, client_id=None):
+        """ComfyUI /prompt 요청 본문({"prompt", "client_id"})을 UTF-8 바이트로 반환"""
+        encoded_values = self._encoded_values(overlay)
+        encoded_values.append(json.dumps(client_id))
+        return self._join(self._request_segments, self._request_slots, encoded_values).encode('utf-8')
+
+    def to_dict(self, overlay):
+        """오버레이를 적용한 워크플로우 dict (확인/디버깅용, 새 객체를 만듦)"""
+        return json.loads(self.render(overlay))